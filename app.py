@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import json
-import os
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
+
+from modele import BladDanych, wczytaj_cele, wczytaj_oszczednosci, wczytaj_raty
+from obserwator import odswiezaj_po_zmianach, wczytaj
+from wykresy import wykres_slupkowy
 
 st.set_page_config(page_title="Finansowy Dashboard", layout="wide")
 
@@ -15,32 +16,24 @@ PLIK_CELE = "cele.json"
 PLIK_RATY = "raty.json"
 
 # ---------- Wczytywanie ---------- #
-def wczytaj_json(nazwa):
-    if os.path.exists(nazwa):
-        with open(nazwa, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-oszczednosci = wczytaj_json(PLIK_OSZCZEDNOSCI)
-cele = wczytaj_json(PLIK_CELE)
-raty = wczytaj_json(PLIK_RATY)
+try:
+    oszczednosci = wczytaj(PLIK_OSZCZEDNOSCI, wczytaj_oszczednosci)
+    cele = wczytaj(PLIK_CELE, wczytaj_cele)
+    raty = wczytaj(PLIK_RATY, wczytaj_raty)
+except BladDanych as e:
+    st.error(f"❌ {e}")
+    st.stop()
+odswiezaj_po_zmianach(PLIK_OSZCZEDNOSCI, PLIK_CELE, PLIK_RATY)
 
 # ---------- Podstawowe info ---------- #
 dzis = date.today()
 miesiac_klucz = f"{dzis.year}-{dzis.month:02}"
-kwota_miesieczna = oszczednosci.get("miesieczne", {}).get(miesiac_klucz, 0)
-suma_rat = 0
-raty_miesiac = []
-
-for r in raty:
-    start = datetime.fromisoformat(r["start"]).date()
-    koniec = datetime.fromisoformat(r["koniec"]).date()
-    if start <= dzis <= koniec:
-        suma_rat += r["kwota"]
-        raty_miesiac.append(r)
-
-suma_cel = sum(cel["kwota_zebrana"] for cel in cele)
-suma_docelowa = sum(cel["kwota_docelowa"] for cel in cele)
+kwota_miesieczna = oszczednosci.miesieczne.get(miesiac_klucz, 0)
+raty_miesiac = [r for r in raty if r.aktywna(dzis)]
+suma_rat = sum(r.kwota for r in raty_miesiac)
+
+suma_cel = sum(cel.kwota_zebrana for cel in cele)
+suma_docelowa = sum(cel.kwota_docelowa for cel in cele)
 procent_cel = (suma_cel / suma_docelowa * 100) if suma_docelowa > 0 else 0
 
 # ---------- Nagłówkowe metryki ---------- #
@@ -53,10 +46,10 @@ st.divider()
 
 # ---------- Mini tablica ukończonych celów ---------- #
 st.subheader("🏆 Ukończone cele")
-cele_ukonczone = [c for c in cele if c.get("ukonczony")]
+cele_ukonczone = [c for c in cele if c.ukonczony]
 if cele_ukonczone:
     for cel in cele_ukonczone[-3:][::-1]:
-        st.success(f"🎉 {cel['emoji']} {cel['cel']} – osiągnięto {cel['kwota_docelowa']} zł!")
+        st.success(f"🎉 {cel.emoji} {cel.cel} – osiągnięto {cel.kwota_docelowa} zł!")
 else:
     st.info("Brak ukończonych celów. Ale to się zmieni 💪")
 
@@ -67,10 +60,10 @@ st.progress(progress_val, text=f"{suma_cel:.0f} / {suma_docelowa:.0f} zł")
 
 # ---------- Historia oszczędności ---------- #
 st.subheader("📈 Oszczędności miesięczne")
-df_oszcz = pd.DataFrame.from_dict(oszczednosci.get("miesieczne", {}), orient="index", columns=["Kwota"])
+df_oszcz = pd.DataFrame.from_dict(oszczednosci.miesieczne, orient="index", columns=["Kwota"])
 df_oszcz.index.name = "Miesiąc"
 df_oszcz.sort_index(inplace=True)
-st.bar_chart(df_oszcz)
+wykres_slupkowy(df_oszcz)
 
 # ---------- Podsumowanie miesiąca ---------- #
 st.subheader("🧠 Podsumowanie miesiąca")
@@ -89,8 +82,7 @@ if not df_oszcz.empty:
 st.subheader("📅 Cel tygodniowy")
 cel_tygodniowy = 150.0
 start_tyg = dzis - timedelta(days=dzis.weekday())
-konto_hist = oszczednosci.get("wykorzystane", [])
-zebrane_tyg = sum(w["kwota"] for w in konto_hist if datetime.fromisoformat(w["data"]).date() >= start_tyg)
+zebrane_tyg = sum(w.kwota for w in oszczednosci.wykorzystane if w.data >= start_tyg)
 
 st.markdown(f"🎯 Cel: {cel_tygodniowy} zł | Zebrano: {zebrane_tyg:.2f} zł")
 postep = min(zebrane_tyg / cel_tygodniowy, 1.0)
@@ -98,7 +90,7 @@ st.progress(postep, text=f"{postep*100:.0f}% tygodniowego celu")
 
 # ---------- Kalendarz płatności ---------- #
 st.subheader("🗓️ Kalendarz płatności")
-raty_data = [(r["nazwa"], datetime.fromisoformat(r["koniec"]).date()) for r in raty if datetime.fromisoformat(r["koniec"]).date().month == dzis.month]
+raty_data = [(r.nazwa, r.koniec) for r in raty if r.koniec.month == dzis.month]
 
 if raty_data:
     df_kalendarz = pd.DataFrame(raty_data, columns=["Rata", "Data"])
@@ -116,8 +108,8 @@ if suma_rat > 0:
 if kwota_miesieczna > 0:
     st.info(f"💡 Masz dostępne oszczędności do przypisania: {kwota_miesieczna:.2f} zł")
 
-aktywnych_cel = [c for c in cele if not c.get("ukonczony", False)]
-deadline_close = [c for c in aktywnych_cel if (datetime.fromisoformat(c["deadline"]) - datetime.today()).days <= 10 and c["kwota_zebrana"] < c["kwota_docelowa"]]
+aktywnych_cel = [c for c in cele if not c.ukonczony]
+deadline_close = [c for c in aktywnych_cel if (c.deadline - dzis).days <= 10 and c.kwota_zebrana < c.kwota_docelowa]
 
 for cel in deadline_close:
-    st.error(f"⏰ Zbliża się deadline celu **{cel['cel']}** – pozostało {(datetime.fromisoformat(cel['deadline']) - datetime.today()).days} dni!")
+    st.error(f"⏰ Zbliża się deadline celu **{cel.cel}** – pozostało {(cel.deadline - dzis).days} dni!")
@@ -0,0 +1,219 @@
+import gzip
+import json
+import os
+import threading
+import uuid
+from datetime import date
+
+import pandas as pd
+
+from modele import BladDanych, zapis_atomowy
+
+KATALOG_ARCHIWUM = "archiwum"
+PLIK_INDEKSU = os.path.join(KATALOG_ARCHIWUM, "indeks.json")
+# Ile ostatnich miesięcy (łącznie z bieżącym) zostaje w "gorących" plikach wydatki-RRRR-MM.json
+HORYZONT_MIESIECY = 12
+KOLUMNY = ["Id", "Data", "Kwota", "Typ", "Opis"]
+# gorący plik w trakcie scalania z archiwum: archiwum/wydatki-RRRR-MM.<znacznik>.scalanie
+ROZSZERZENIE_SCALANIA = ".scalanie"
+
+_blokada = threading.Lock()
+
+# ---------- Kompresja ---------- #
+
+def _nazwa_archiwum(miesiac):
+    # archiwa są współdzielone przez gita, więc zapisujemy zawsze w formacie dostępnym wszędzie
+    return os.path.join(KATALOG_ARCHIWUM, f"wydatki-{miesiac}.json.gz")
+
+
+def _zapisz_skompresowane(plik, dane):
+    surowe = json.dumps(dane, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    with zapis_atomowy(plik, "wb") as f:
+        f.write(gzip.compress(surowe, compresslevel=9))
+
+
+def _wczytaj_skompresowane(plik):
+    with open(plik, "rb") as f:
+        surowe = f.read()
+    try:
+        return json.loads(gzip.decompress(surowe))
+    except (OSError, EOFError, ValueError) as e:
+        raise BladDanych(f"Uszkodzone archiwum {plik}: {e}") from e
+
+# ---------- Indeks ---------- #
+
+def wczytaj_indeks(plik=PLIK_INDEKSU):
+    """Małe podsumowania zarchiwizowanych miesięcy: suma, sumy per typ i sumy dzienne per typ."""
+    if os.path.exists(plik):
+        with open(plik, "r", encoding="utf-8") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError as e:
+                raise BladDanych(f"Uszkodzony indeks archiwum {plik}: {e}") from e
+    return {}
+
+
+def _zapisz_indeks(indeks):
+    with zapis_atomowy(PLIK_INDEKSU) as f:
+        json.dump(dict(sorted(indeks.items())), f, indent=2, ensure_ascii=False)
+
+
+def _podsumuj(df, plik):
+    daty = pd.to_datetime(df["Data"])
+    dzienne = df["Kwota"].groupby([daty.dt.strftime("%d"), df["Typ"]]).sum()
+    dni = {}
+    for (dzien, typ), kwota in dzienne.items():
+        dni.setdefault(dzien, {})[typ] = round(float(kwota), 2)
+    return {
+        "plik": plik,
+        "wierszy": len(df),
+        "suma": round(float(df["Kwota"].sum()), 2),
+        "typy": {t: round(float(k), 2) for t, k in df.groupby("Typ")["Kwota"].sum().items()},
+        "dni": dni,
+    }
+
+
+def suma_archiwalna(indeks, rok, typ=None):
+    """Suma wydatków z zarchiwizowanych miesięcy danego roku (opcjonalnie tylko jednego typu)."""
+    miesiace = [p for m, p in indeks.items() if m.startswith(f"{rok}-")]
+    if typ is None:
+        return sum(p["suma"] for p in miesiace)
+    return sum(p["typy"].get(typ, 0.0) for p in miesiace)
+
+
+def partycje_dzienne(indeks):
+    """Dzienne sumy per typ z indeksu – do zapytań o zakres dat bez rozpakowywania archiwów."""
+    partycje = {}
+    for miesiac, podsumowanie in indeks.items():
+        wiersze = {pd.Timestamp(f"{miesiac}-{dzien}"): typy for dzien, typy in podsumowanie["dni"].items()}
+        partycje[miesiac] = pd.DataFrame.from_dict(wiersze, orient="index").fillna(0.0)
+    return partycje
+
+# ---------- Archiwizacja ---------- #
+
+def _wczytaj_archiwum(plik):
+    kolumny = _wczytaj_skompresowane(plik)
+    df = pd.DataFrame(kolumny, columns=KOLUMNY)
+    if "Id" not in kolumny:  # archiwa sprzed wprowadzenia stałych id
+        df["Id"] = range(len(df))
+    df["Id"] = df["Id"].astype("int64")
+    df["Data"] = pd.to_datetime(df["Data"])
+    return df, kolumny.get("Scalony")
+
+
+def wczytaj_miesiac(plik):
+    """Rozpakowuje jeden zarchiwizowany miesiąc (kolumnowy JSON) do ramki."""
+    return _wczytaj_archiwum(plik)[0]
+
+
+def _zapisz_miesiac(indeks, miesiac, df, scalony=None):
+    # wiersze mają stałe id – nowe (np. zaległe wydatki scalane z archiwum) dostają kolejne wolne
+    ids = df["Id"] if "Id" in df else pd.Series(pd.NA, index=df.index)
+    nowe = ids.isna()
+    start = int(ids.max()) + 1 if not nowe.all() else 0
+    ids = ids.copy()
+    ids[nowe] = range(start, start + int(nowe.sum()))
+    plik = _nazwa_archiwum(miesiac)
+    kolumny = {
+        "Id": ids.astype("int64").tolist(),
+        "Data": pd.to_datetime(df["Data"]).dt.strftime("%Y-%m-%dT%H:%M:%S.000").tolist(),
+        "Kwota": df["Kwota"].astype(float).tolist(),
+        "Typ": df["Typ"].astype(str).tolist(),
+        "Opis": df["Opis"].fillna("").astype(str).tolist(),
+        # znacznik ostatnio scalonego gorącego pliku – ponowne scalenie po awarii go pomija
+        "Scalony": scalony,
+    }
+    _zapisz_skompresowane(plik, kolumny)
+    stary = indeks.get(miesiac, {}).get("plik")
+    if stary and stary != plik and os.path.exists(stary):
+        os.remove(stary)
+    indeks[miesiac] = _podsumuj(df, plik)
+
+
+def _scal(indeks, miesiac, scalanie):
+    """Scala jeden odłożony gorący plik z archiwum miesiąca; bezpieczne do powtórzenia po awarii."""
+    df = pd.read_json(scalanie) if os.path.getsize(scalanie) else pd.DataFrame(columns=KOLUMNY[1:])
+    znacznik = os.path.basename(scalanie)
+    if miesiac in indeks and os.path.exists(indeks[miesiac]["plik"]):
+        stare, scalony = _wczytaj_archiwum(indeks[miesiac]["plik"])
+        # archiwum zapisane, ale indeks albo usunięcie pliku przerwane – wierszy nie dokładamy drugi raz
+        df = stare if scalony == znacznik else pd.concat([stare, df], ignore_index=True)
+    if not df.empty:
+        _zapisz_miesiac(indeks, miesiac, df, scalony=znacznik)
+        _zapisz_indeks(indeks)
+    os.remove(scalanie)
+    return not df.empty
+
+
+def archiwizuj(horyzont=HORYZONT_MIESIECY, dzis=None):
+    """Przenosi pliki wydatki-RRRR-MM.json starsze niż `horyzont` miesięcy do archiwum.
+
+    Jeśli miesiąc był już w archiwum (np. dopisano zaległy wydatek), wiersze są scalane.
+    Gorący plik najpierw jest przenoszony (jednym `os.replace`) do pliku `.scalanie`
+    w katalogu archiwum, którego nazwa trafia do zapisanego archiwum – przerwane scalanie
+    kończy się przy następnym wywołaniu, bez gubienia i bez podwajania wierszy.
+    Miesiące z uszkodzonym plikiem zostają w gorącej części.
+    Zwraca listę przeniesionych miesięcy.
+    """
+    dzis = dzis or date.today()
+    granica = dzis.year * 12 + dzis.month - horyzont
+    do_przeniesienia = []
+    for plik in sorted(os.listdir()):
+        if plik.startswith("wydatki-") and plik.endswith(".json"):
+            miesiac = plik[len("wydatki-"):-len(".json")]
+            rok, mies = miesiac.split("-")
+            if int(rok) * 12 + int(mies) - 1 < granica:
+                do_przeniesienia.append((miesiac, plik))
+    przerwane = sorted(
+        p for p in (os.listdir(KATALOG_ARCHIWUM) if os.path.isdir(KATALOG_ARCHIWUM) else [])
+        if p.startswith("wydatki-") and p.endswith(ROZSZERZENIE_SCALANIA)
+    )
+    if not do_przeniesienia and not przerwane:
+        return []
+
+    with _blokada:
+        os.makedirs(KATALOG_ARCHIWUM, exist_ok=True)
+        indeks = wczytaj_indeks()
+        scalania = [(p[len("wydatki-"):len("wydatki-RRRR-MM")], os.path.join(KATALOG_ARCHIWUM, p), None)
+                    for p in przerwane]
+        for miesiac, plik in do_przeniesienia:
+            scalanie = os.path.join(
+                KATALOG_ARCHIWUM, f"wydatki-{miesiac}.{uuid.uuid4().hex[:12]}{ROZSZERZENIE_SCALANIA}")
+            try:
+                os.replace(plik, scalanie)
+            except FileNotFoundError:  # inny proces właśnie go przeniósł
+                continue
+            scalania.append((miesiac, scalanie, plik))
+
+        przeniesione = []
+        for miesiac, scalanie, plik in scalania:
+            try:
+                if _scal(indeks, miesiac, scalanie):
+                    przeniesione.append(miesiac)
+            except FileNotFoundError:  # przerwane scalanie dokończył już inny proces
+                continue
+            except ValueError:  # także BladDanych – uszkodzony plik wraca do gorącej części
+                plik = plik or f"wydatki-{miesiac}.json"
+                if not os.path.exists(plik):
+                    os.replace(scalanie, plik)
+    return przeniesione
+
+
+def usun_z_archiwum(miesiac, id_wiersza):
+    """Usuwa wiersz o danym id z zarchiwizowanego miesiąca i aktualizuje indeks."""
+    with _blokada:
+        indeks = wczytaj_indeks()
+        plik = indeks[miesiac]["plik"]
+        df, scalony = _wczytaj_archiwum(plik)
+        df = df[df["Id"] != id_wiersza]
+        if df.empty:
+            os.remove(plik)
+            del indeks[miesiac]
+        else:
+            _zapisz_miesiac(indeks, miesiac, df.reset_index(drop=True), scalony)
+        _zapisz_indeks(indeks)
+        return plik
+
+
+if __name__ == "__main__":
+    print("Zarchiwizowano:", ", ".join(archiwizuj()) or "nic")
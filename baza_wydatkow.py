@@ -0,0 +1,274 @@
+import itertools
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+import archiwum
+import obserwator
+from indeks_wydatkow import IndeksWydatkow
+from modele import BladDanych, zapis_atomowy
+
+WZORZEC_PLIKOW = "wydatki-*.json"
+KOLUMNY = ["Data", "Kwota", "Typ", "Opis"]
+
+
+def _miesiac_z_pliku(plik):
+    return plik[len("wydatki-"):-len(".json")]
+
+
+def _plik_miesiaca(miesiac):
+    return f"wydatki-{miesiac}.json"
+
+
+def _pusta():
+    return pd.DataFrame({
+        "Data": pd.Series(dtype="datetime64[ns]"),
+        "Kwota": pd.Series(dtype=float),
+        "Typ": pd.Series(dtype=object),
+        "Opis": pd.Series(dtype=object),
+        "Miesiąc": pd.Series(dtype=object),
+        "Rok": pd.Series(dtype="int64"),
+    })
+
+
+def _z_kolumnami_daty(df, miesiac):
+    df = df.reindex(columns=KOLUMNY)
+    df["Data"] = pd.to_datetime(df["Data"])
+    df["Miesiąc"] = miesiac
+    df["Rok"] = int(miesiac[:4])
+    return df
+
+
+def _do_usuniecia(df, usuniete):
+    """Id wierszy `df` do usunięcia: po stałym id, a gdy miesiąc wczytano od nowa (nowe id) – po treści."""
+    wynik = [i for i in usuniete if i in df.index]
+    for id_wiersza, wiersz in usuniete.items():
+        if id_wiersza in df.index:
+            continue
+        pasujace = df.index[
+            (df["Data"] == pd.Timestamp(wiersz["Data"])) & (df["Kwota"] == wiersz["Kwota"]) & (df["Typ"] == wiersz["Typ"])
+        ]
+        wolne = [i for i in pasujace if i not in wynik]
+        if wolne:
+            wynik.append(wolne[0])
+    return wynik
+
+# ---------- Wspólna baza (jedna na proces) ---------- #
+
+class BazaWydatkow:
+    """Jedna, tylko do odczytu kopia wszystkich gorących wydatków, wspólna dla wszystkich sesji.
+
+    Wydatki są trzymane w jednej ramce posortowanej po miesiącach (z gotowymi kolumnami
+    `Miesiąc` i `Rok`), budowanej raz na wersję bazy. Ramki nigdy się nie modyfikuje –
+    zapis buduje nową ramkę z podmienionym jednym miesiącem i publikuje ją jako nową
+    wersję (copy-on-write), a stara znika, gdy żadne uruchomienie strony już jej nie używa.
+    W bazie jest też wspólny indeks sum narastających, przeliczany tylko dla zmienionych
+    miesięcy. Każdy wiersz ma stałe id (indeks ramki), więc usuwanie nie zależy od
+    pozycji wiersza w wersji, którą widziała sesja.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._id = itertools.count()
+        self._wersje_plikow = {}
+        self._sygnatura_archiwum = ()
+        self._indeks = IndeksWydatkow()
+        # ramka i zakresy wierszy miesięcy podmieniane razem, jednym przypisaniem
+        self._stan = (_pusta(), {})
+        self.wersja = 0
+        self.wersje_miesiecy = {}
+        self.odswiez()
+
+    def _wczytaj_partycje(self, plik):
+        try:
+            df = pd.read_json(plik) if os.path.getsize(plik) else pd.DataFrame(columns=KOLUMNY)
+        except ValueError as e:
+            raise BladDanych(f"Nie udało się wczytać {plik}: {e}") from e
+        df = _z_kolumnami_daty(df, _miesiac_z_pliku(plik))
+        df.index = pd.Index([next(self._id) for _ in range(len(df))], dtype="int64")
+        return df
+
+    def _opublikuj(self, zmiany):
+        ramka, zakresy = self._stan
+        czesci = {m: ramka.iloc[a:b] for m, (a, b) in zakresy.items() if m not in zmiany}
+        czesci.update({m: df for m, df in zmiany.items() if df is not None and not df.empty})
+        klucze = sorted(czesci)
+        nowe_zakresy, poczatek = {}, 0
+        for miesiac in klucze:
+            nowe_zakresy[miesiac] = (poczatek, poczatek + len(czesci[miesiac]))
+            poczatek += len(czesci[miesiac])
+        nowa = pd.concat([czesci[m] for m in klucze]) if klucze else _pusta()
+        self._stan = (nowa, nowe_zakresy)
+
+        # indeks: przy pierwszym wczytaniu cała ramka, potem tylko zmienione miesiące
+        self._indeks.uniewaznij(list(zmiany))
+        zmienione = [df for df in zmiany.values() if df is not None and not df.empty]
+        self._indeks.synchronizuj(pd.concat(zmienione) if zmienione else _pusta())
+
+        wersje = dict(self.wersje_miesiecy)
+        for miesiac in zmiany:
+            wersje[miesiac] = wersje.get(miesiac, 0) + 1
+        self.wersje_miesiecy = wersje
+        self.wersja += 1
+
+    def odswiez(self):
+        """Wczytuje ponownie tylko te miesiące, których pliki zmieniły się poza bazą (git pull, archiwizacja).
+
+        Wersje plików są czytane pod blokadą, żeby nie nadpisać wersji zapamiętanej przez
+        równoległy `zatwierdz` starszą; liczniki obserwatora tylko rosną, więc bierzemy nowsze.
+        Uszkodzony plik nie zmienia bazy i jest zgłaszany jako `BladDanych` (po wczytaniu pozostałych).
+        """
+        obs = obserwator.obserwator()
+        with self._lock:
+            wersje = obs.wersje(WZORZEC_PLIKOW)
+            sygnatura_archiwum = obs.sprawdz(archiwum.PLIK_INDEKSU)
+            if sygnatura_archiwum != self._sygnatura_archiwum:
+                # do zakresów dat wystarczają dzienne sumy z małego indeksu archiwum;
+                # sygnaturę zapamiętujemy dopiero po udanym wczytaniu, żeby uszkodzony indeks wczytać ponownie
+                self._indeks.ustaw_archiwum(archiwum.partycje_dzienne(archiwum.wczytaj_indeks()))
+                self._sygnatura_archiwum = sygnatura_archiwum
+            zmienione = [p for p, w in wersje.items() if w > self._wersje_plikow.get(p, -1)]
+            if not zmienione:
+                return
+            zmiany, bledy = {}, []
+            for plik in zmienione:
+                try:
+                    zmiany[_miesiac_z_pliku(plik)] = self._wczytaj_partycje(plik) if os.path.exists(plik) else None
+                except BladDanych as e:
+                    bledy.append(str(e))
+                    continue
+                self._wersje_plikow[plik] = wersje[plik]
+            if zmiany:
+                self._opublikuj(zmiany)
+        if bledy:
+            raise BladDanych("; ".join(bledy))
+
+    def ramka(self):
+        """Wszystkie wydatki z bieżącej wersji bazy – tylko do odczytu, nie wolno jej zmieniać."""
+        return self._stan[0]
+
+    def rok(self, rok):
+        """Wydatki jednego roku – wycinek wspólnej ramki (miesiące leżą w niej po kolei)."""
+        ramka, zakresy = self._stan
+        pozycje = [z for m, z in zakresy.items() if m.startswith(f"{rok}-")]
+        if not pozycje:
+            return ramka.iloc[0:0]
+        return ramka.iloc[min(a for a, _ in pozycje):max(b for _, b in pozycje)]
+
+    def lata(self):
+        return {int(m[:4]) for m in self._stan[1]}
+
+    def kategorie(self):
+        with self._lock:
+            return list(self._indeks.kategorie)
+
+    def porownaj(self, od, do, dodatkowe=None):
+        """Podział na typy dla [od, do] i poprzedniego okresu – ze wspólnego indeksu."""
+        with self._lock:
+            return self._indeks.porownaj(od, do, dodatkowe)
+
+    def zatwierdz(self, nakladka):
+        """Zapisuje zmiany z nakładki sesji na dysk i publikuje nową wersję bazy.
+
+        Zmiany są nakładane na najnowszą wersję miesiąca (a nie na to, co sesja widziała
+        przy ostatnim odświeżeniu), więc równoległe zapisy z różnych kart się nie gubią.
+        Usuwany wiersz jest szukany po id, a gdy miesiąc wczytano od nowa – po dacie, kwocie
+        i typie. Miesiące bez faktycznej zmiany (wiersz usunięty już gdzie indziej) nie są
+        zapisywane. Zwraca listę zapisanych plików.
+        """
+        self.odswiez()
+        obs = obserwator.obserwator()
+        with self._lock:
+            ramka, zakresy = self._stan
+            zmiany = {}
+            for miesiac in nakladka.miesiace():
+                plik = _plik_miesiaca(miesiac)
+                a, b = zakresy.get(miesiac, (0, 0))
+                stara = ramka.iloc[a:b]
+                usuwane = _do_usuniecia(stara, nakladka.usuniete_w(miesiac))
+                dodane = nakladka.dodane_w(miesiac)
+                if not usuwane and dodane.empty:
+                    continue
+                nowa = stara.drop(index=usuwane)
+                if not dodane.empty:
+                    dodane = _z_kolumnami_daty(dodane, miesiac)
+                    dodane.index = pd.Index([next(self._id) for _ in range(len(dodane))], dtype="int64")
+                    nowa = pd.concat([nowa, dodane]) if not nowa.empty else dodane
+                with zapis_atomowy(plik) as f:
+                    nowa[KOLUMNY].to_json(f, orient="records", indent=2, date_format="iso")
+                obs.sprawdz(plik)
+                self._wersje_plikow[plik] = obs.wersje(plik, odswiez=False)[plik]
+                zmiany[miesiac] = nowa
+            if zmiany:
+                self._opublikuj(zmiany)
+        nakladka.wyczysc()
+        return [_plik_miesiaca(m) for m in zmiany]
+
+
+@st.cache_resource
+def baza_wydatkow():
+    return BazaWydatkow()
+
+# ---------- Nakładka sesji ---------- #
+
+class NakladkaSesji:
+    """Niezatwierdzone zmiany jednej sesji: dodane wiersze i usunięte wiersze bazy (po id)."""
+
+    def __init__(self):
+        self.dodane = pd.DataFrame(columns=KOLUMNY)
+        self.usuniete = {}
+
+    def __bool__(self):
+        return not self.dodane.empty or bool(self.usuniete)
+
+    def dodaj(self, data, kwota, typ, opis):
+        wiersz = pd.DataFrame([{"Data": pd.Timestamp(data), "Kwota": kwota, "Typ": typ, "Opis": opis}])
+        self.dodane = pd.concat([self.dodane, wiersz], ignore_index=True) if not self.dodane.empty else wiersz
+
+    def usun(self, id_wiersza, wiersz):
+        if isinstance(id_wiersza, str):
+            # wiersz jeszcze niezatwierdzony – wystarczy wyrzucić go z nakładki
+            self.dodane = self.dodane.drop(index=int(id_wiersza[1:])).reset_index(drop=True)
+            return
+        self.usuniete[id_wiersza] = {k: wiersz[k] for k in ("Data", "Kwota", "Typ")}
+
+    def miesiace(self):
+        dodane = pd.to_datetime(self.dodane["Data"]).dt.strftime("%Y-%m")
+        usuniete = {f"{w['Data']:%Y-%m}" for w in self.usuniete.values()}
+        return sorted(set(dodane) | usuniete)
+
+    def usuniete_w(self, miesiac):
+        return {i: w for i, w in self.usuniete.items() if f"{w['Data']:%Y-%m}" == miesiac}
+
+    def dodane_w(self, miesiac):
+        return self.dodane[pd.to_datetime(self.dodane["Data"]).dt.strftime("%Y-%m") == miesiac]
+
+    def lata(self):
+        return set(pd.to_datetime(self.dodane["Data"]).dt.year)
+
+    def naloz(self, df, rok):
+        """Wycinek bazy dla roku z niezatwierdzonymi zmianami sesji (bez kopii, gdy zmian brak)."""
+        if not self:
+            return df
+        df = df.drop(index=[i for i in self.usuniete if i in df.index])
+        dodane = self.dodane[pd.to_datetime(self.dodane["Data"]).dt.year == rok]
+        if dodane.empty:
+            return df
+        dodane = dodane.set_axis([f"n{i}" for i in dodane.index])
+        dodane["Data"] = pd.to_datetime(dodane["Data"])
+        dodane["Miesiąc"] = dodane["Data"].dt.strftime("%Y-%m")
+        dodane["Rok"] = rok
+        return pd.concat([df, dodane]) if not df.empty else dodane
+
+    def roznica(self):
+        """Zmiany nakładki jako wiersze do zapytań o zakres: dodane i usunięte z ujemną kwotą."""
+        usuniete = pd.DataFrame(list(self.usuniete.values()), columns=["Data", "Kwota", "Typ"])
+        usuniete["Kwota"] = -usuniete["Kwota"]
+        czesci = [c for c in (self.dodane[["Data", "Kwota", "Typ"]], usuniete) if not c.empty]
+        return pd.concat(czesci, ignore_index=True) if czesci else usuniete
+
+    def wyczysc(self):
+        self.dodane = pd.DataFrame(columns=KOLUMNY)
+        self.usuniete = {}
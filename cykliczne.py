@@ -0,0 +1,53 @@
+import calendar
+from datetime import date
+
+import pandas as pd
+
+PLIK_CYKLICZNE = "wydatki_cykliczne.json"
+
+CYKLE = {"Co miesiąc": 1, "Co kwartał": 3, "Co pół roku": 6, "Co rok": 12}
+
+KOLUMNY = ["Data", "Kwota", "Typ", "Opis", "Cykliczny"]
+
+# ---------- Rozwijanie definicji ---------- #
+
+def rozwin(definicje, od, do):
+    """Generuje wirtualne wiersze wydatków cyklicznych z zakresu [od, do].
+
+    Nic nie jest zapisywane – wiersze powstają tylko dla miesięcy, o które pyta widok.
+    Kolumna `Cykliczny` to pozycja definicji na liście (potrzebna przy nadpisaniach).
+    """
+    for i, definicja in enumerate(definicje):
+        poczatek = max(definicja.start, od)
+        koniec = min(definicja.koniec or do, do)
+        if poczatek > koniec:
+            continue
+        krok = definicja.co_ile_miesiecy
+        numer_startu = definicja.start.year * 12 + definicja.start.month - 1
+        numer = poczatek.year * 12 + poczatek.month - 1
+        numer += (numer_startu - numer) % krok
+        while numer <= koniec.year * 12 + koniec.month - 1:
+            rok, miesiac = divmod(numer, 12)
+            miesiac += 1
+            dzien = date(rok, miesiac, min(definicja.start.day, calendar.monthrange(rok, miesiac)[1]))
+            numer += krok
+            if not poczatek <= dzien <= koniec:
+                continue
+            kwota = definicja.nadpisania.get(f"{rok}-{miesiac:02}", definicja.kwota)
+            if kwota is None:
+                continue
+            yield {
+                "Data": pd.Timestamp(dzien),
+                "Kwota": kwota,
+                "Typ": definicja.typ,
+                "Opis": definicja.opis,
+                "Cykliczny": i,
+            }
+
+
+def ramka_cykliczna(definicje, od, do):
+    wiersze = list(rozwin(definicje, od, do))
+    indeks = [f"c{w['Cykliczny']}-{w['Data']:%Y-%m}" for w in wiersze]
+    df = pd.DataFrame(wiersze, columns=KOLUMNY, index=indeks)
+    df["Data"] = pd.to_datetime(df["Data"])
+    return df
@@ -0,0 +1,185 @@
+import bisect
+import calendar
+
+import numpy as np
+import pandas as pd
+
+# ---------- Indeks sum narastających ---------- #
+
+def _klucz_miesiaca(dzien):
+    return f"{dzien.year}-{dzien.month:02}"
+
+
+def _po_dniach(dzienne):
+    # sumy dzienne z indeksu archiwum mają daty w indeksie – w bloku liczy się tylko dzień miesiąca
+    if isinstance(dzienne.index, pd.DatetimeIndex):
+        dzienne = dzienne.set_axis(dzienne.index.day)
+    return dzienne.fillna(0.0)
+
+
+def poprzedni_okres(od, do):
+    """Okres o tej samej długości kończący się dzień przed `od`."""
+    od, do = pd.Timestamp(od), pd.Timestamp(do)
+    return od - (do - od + pd.Timedelta(days=1)), od - pd.Timedelta(days=1)
+
+
+class IndeksWydatkow:
+    """Dzienne sumy narastające wydatków per typ.
+
+    Każdy miesiąc (tak jak pliki `wydatki-RRRR-MM.json`) ma własny blok sum
+    narastających liczonych od początku miesiąca, a osobny mały wektor trzyma sumy
+    wszystkich miesięcy przed danym. Zapis unieważnia tylko dotknięte miesiące –
+    przy następnym `synchronizuj` przeliczane są wyłącznie ich bloki i wektor sum,
+    a zapytania o dowolny zakres dat kosztują O(log liczby miesięcy) na typ.
+    """
+
+    def __init__(self):
+        self._goraca = {}
+        self._archiwalne = {}
+        self._bloki = {}
+        self._brudne = set()
+        self._wszystko = True
+        self._klucze = []
+        self._kategorie = pd.Index([])
+        self._pozycje = {}
+        self._przed = np.zeros((1, 0))
+
+    @property
+    def kategorie(self):
+        return self._kategorie
+
+    def uniewaznij(self, miesiace=None):
+        if miesiace is None:
+            self._wszystko = True
+        else:
+            self._brudne.update(miesiace)
+
+    def ustaw_archiwum(self, partycje):
+        """Dzienne sumy zarchiwizowanych miesięcy (z indeksu archiwum) – bez rozpakowywania danych."""
+        partycje = {m: _po_dniach(p) for m, p in partycje.items()}
+        zmienione = {
+            m for m in partycje.keys() | self._archiwalne.keys()
+            if m not in partycje or m not in self._archiwalne or not partycje[m].equals(self._archiwalne[m])
+        }
+        self._archiwalne = partycje
+        for miesiac in zmienione:
+            self._zbuduj_blok(miesiac)
+        self._przelicz_sumy()
+
+    def ustaw_miesiac(self, miesiac, df):
+        """Przelicza jeden miesiąc na podstawie jego wierszy (kolumny Data, Kwota, Typ)."""
+        self._ustaw(miesiac, df)
+        self._przelicz_sumy()
+
+    def synchronizuj(self, df):
+        """Przelicza unieważnione miesiące na podstawie ramki z kolumnami Data, Kwota, Typ.
+
+        Jeśli ramka ma już kolumnę `Miesiąc` (RRRR-MM), daty nie są ponownie parsowane.
+        """
+        if not self._wszystko and not self._brudne:
+            return
+        klucze = df["Miesiąc"] if "Miesiąc" in df else pd.to_datetime(df["Data"]).dt.strftime("%Y-%m")
+        if self._wszystko:
+            miesiace = set(self._goraca) | set(klucze.unique())
+        else:
+            miesiace = set(self._brudne)
+            wybrane = klucze.isin(miesiace)
+            df, klucze = df[wybrane], klucze[wybrane]
+        # jedno grupowanie dla wszystkich przeliczanych miesięcy zamiast osobnego na każdy
+        dni = pd.to_datetime(df["Data"]).dt.day
+        dzienne = df["Kwota"].groupby([klucze, dni, df["Typ"]]).sum().unstack(fill_value=0.0)
+        obecne = set(dzienne.index.get_level_values(0))
+        for miesiac in miesiace:
+            self._brudne.discard(miesiac)
+            if miesiac in obecne:
+                czesc = dzienne.xs(miesiac, level=0)
+                self._goraca[miesiac] = czesc.loc[:, (czesc != 0).any().to_numpy()]
+            else:
+                self._goraca.pop(miesiac, None)
+            self._zbuduj_blok(miesiac)
+
+        self._brudne = set()
+        self._wszystko = False
+        self._przelicz_sumy()
+
+    def _ustaw(self, miesiac, df):
+        self._brudne.discard(miesiac)
+        if df is None or df.empty:
+            self._goraca.pop(miesiac, None)
+        else:
+            dni = pd.to_datetime(df["Data"]).dt.day
+            self._goraca[miesiac] = df["Kwota"].groupby([dni, df["Typ"]]).sum().unstack(fill_value=0.0)
+        self._zbuduj_blok(miesiac)
+
+    def _zbuduj_blok(self, miesiac):
+        # miesiąc może mieć część w archiwum i część w gorącym pliku – obie się sumują
+        czesci = [p for p in (self._goraca.get(miesiac), self._archiwalne.get(miesiac)) if p is not None]
+        if not czesci:
+            self._bloki.pop(miesiac, None)
+            return
+        rok, mies = map(int, miesiac.split("-"))
+        kategorie = sorted(set().union(*(p.columns for p in czesci)))
+        pozycje = {k: i for i, k in enumerate(kategorie)}
+        # wiersz 0 to zera, wiersz d – suma dni 1..d
+        narastajaco = np.zeros((calendar.monthrange(rok, mies)[1] + 1, len(kategorie)))
+        for czesc in czesci:
+            wiersze = czesc.index.to_numpy(dtype=int)
+            narastajaco[np.ix_(wiersze, [pozycje[k] for k in czesc.columns])] += czesc.to_numpy(dtype=float)
+        np.cumsum(narastajaco, axis=0, out=narastajaco)
+        self._bloki[miesiac] = (kategorie, narastajaco)
+
+    def _przelicz_sumy(self):
+        self._klucze = sorted(self._bloki)
+        if not self._klucze:
+            self._kategorie = pd.Index([])
+            self._przed = np.zeros((1, 0))
+            return
+        self._kategorie = pd.Index(sorted(set().union(*(k for k, _ in self._bloki.values()))))
+        self._pozycje = {k: i for i, k in enumerate(self._kategorie)}
+        sumy = np.zeros((len(self._klucze), len(self._kategorie)))
+        for i, miesiac in enumerate(self._klucze):
+            kategorie, narastajaco = self._bloki[miesiac]
+            sumy[i, [self._pozycje[k] for k in kategorie]] = narastajaco[-1]
+        self._przed = np.vstack([np.zeros((1, len(self._kategorie))), np.cumsum(sumy, axis=0)])
+
+    def _przed_dniem(self, dzien):
+        """Suma wszystkich wydatków per typ sprzed danego dnia."""
+        miesiac = _klucz_miesiaca(dzien)
+        wynik = self._przed[bisect.bisect_left(self._klucze, miesiac)].copy()
+        if miesiac in self._bloki:
+            kategorie, narastajaco = self._bloki[miesiac]
+            wynik[[self._pozycje[k] for k in kategorie]] += narastajaco[dzien.day - 1]
+        return wynik
+
+    def podzial(self, od, do, dodatkowe=None):
+        """Suma wydatków per typ w zakresie [od, do] (obie daty włącznie).
+
+        `dodatkowe` to opcjonalne wiersze spoza indeksu (np. wirtualne wydatki cykliczne),
+        doliczane tylko wtedy, gdy mieszczą się w zakresie.
+        """
+        od, do = pd.Timestamp(od).normalize(), pd.Timestamp(do).normalize()
+        if not self._klucze or od > do:
+            wynik = pd.Series(0.0, index=self._kategorie, name="Kwota")
+        else:
+            roznica = self._przed_dniem(do + pd.Timedelta(days=1)) - self._przed_dniem(od)
+            wynik = pd.Series(roznica, index=self._kategorie, name="Kwota")
+        if dodatkowe is not None and not dodatkowe.empty and od <= do:
+            daty = pd.to_datetime(dodatkowe["Data"]).dt.normalize()
+            w_zakresie = dodatkowe[(daty >= od) & (daty <= do)]
+            wynik = wynik.add(w_zakresie.groupby("Typ")["Kwota"].sum(), fill_value=0.0).rename("Kwota")
+        return wynik
+
+    def suma(self, od, do, kategorie=None, dodatkowe=None):
+        podzial = self.podzial(od, do, dodatkowe)
+        if kategorie:
+            podzial = podzial.reindex(kategorie, fill_value=0.0)
+        return float(podzial.sum())
+
+    def porownaj(self, od, do, dodatkowe=None):
+        """Zwraca ramkę z podziałem dla [od, do] i poprzedniego okresu o tej samej długości."""
+        od, do = pd.Timestamp(od), pd.Timestamp(do)
+        poprzedni_od, poprzedni_do = poprzedni_okres(od, do)
+        return pd.DataFrame({
+            "Okres": self.podzial(od, do, dodatkowe),
+            "Poprzedni okres": self.podzial(poprzedni_od, poprzedni_do, dodatkowe),
+        }).fillna(0.0)
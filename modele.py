@@ -0,0 +1,249 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import date, datetime
+
+# ---------- Rekordy ---------- #
+
+class BladDanych(ValueError):
+    """Plik z danymi ma nieprawidłowy format."""
+
+
+def _data(wartosc, pole):
+    if isinstance(wartosc, date):
+        return wartosc
+    try:
+        return datetime.fromisoformat(str(wartosc)).date()
+    except ValueError:
+        raise BladDanych(f"Nieprawidłowa data w polu '{pole}': {wartosc!r}") from None
+
+
+def _liczba(wartosc, pole):
+    if isinstance(wartosc, bool) or not isinstance(wartosc, (int, float)):
+        raise BladDanych(f"Nieprawidłowa kwota w polu '{pole}': {wartosc!r}")
+    return float(wartosc)
+
+
+def _calkowita(wartosc, pole):
+    if (
+        isinstance(wartosc, bool)
+        or not isinstance(wartosc, (int, float))
+        or isinstance(wartosc, float) and not wartosc.is_integer()
+    ):
+        raise BladDanych(f"Nieprawidłowa liczba całkowita w polu '{pole}': {wartosc!r}")
+    return int(wartosc)
+
+
+def _pole(d, klucz, rekord):
+    try:
+        return d[klucz]
+    except (KeyError, TypeError):
+        raise BladDanych(f"Brak pola '{klucz}' w rekordzie {rekord}: {d!r}") from None
+
+
+def _obiekt(d, klucz):
+    wartosc = d.get(klucz) or {}
+    if not isinstance(wartosc, dict):
+        raise BladDanych(f"Pole '{klucz}' powinno być obiektem, otrzymano: {wartosc!r}")
+    return wartosc
+
+
+def _tablica(d, klucz):
+    wartosc = d.get(klucz) or []
+    if not isinstance(wartosc, list):
+        raise BladDanych(f"Pole '{klucz}' powinno być listą, otrzymano: {wartosc!r}")
+    return wartosc
+
+
+@dataclass(slots=True)
+class Rata:
+    nazwa: str
+    kwota: float
+    liczba_rat: int
+    start: date
+    koniec: date
+
+    @classmethod
+    def z_dict(cls, d):
+        return cls(
+            nazwa=str(_pole(d, "nazwa", "raty")),
+            kwota=_liczba(_pole(d, "kwota", "raty"), "kwota"),
+            liczba_rat=_calkowita(_pole(d, "liczba_rat", "raty"), "liczba_rat"),
+            start=_data(_pole(d, "start", "raty"), "start"),
+            koniec=_data(_pole(d, "koniec", "raty"), "koniec"),
+        )
+
+    def aktywna(self, dzien):
+        return self.start <= dzien <= self.koniec
+
+
+@dataclass(slots=True)
+class Doplata:
+    data: date
+    kwota: float
+
+    @classmethod
+    def z_dict(cls, d):
+        return cls(
+            data=_data(_pole(d, "data", "dopłaty"), "data"),
+            kwota=_liczba(_pole(d, "kwota", "dopłaty"), "kwota"),
+        )
+
+
+@dataclass(slots=True)
+class Cel:
+    emoji: str
+    cel: str
+    kwota_docelowa: float
+    kwota_zebrana: float
+    deadline: date
+    doplaty: list = field(default_factory=list)
+    ukonczony: bool = False
+
+    @classmethod
+    def z_dict(cls, d):
+        return cls(
+            emoji=str(d.get("emoji", "🎯")),
+            cel=str(_pole(d, "cel", "celu")),
+            kwota_docelowa=_liczba(_pole(d, "kwota_docelowa", "celu"), "kwota_docelowa"),
+            kwota_zebrana=_liczba(_pole(d, "kwota_zebrana", "celu"), "kwota_zebrana"),
+            deadline=_data(_pole(d, "deadline", "celu"), "deadline"),
+            doplaty=[Doplata.z_dict(p) for p in _tablica(d, "doplaty")],
+            ukonczony=bool(d.get("ukonczony", False)),
+        )
+
+
+@dataclass(slots=True)
+class Wykorzystanie:
+    data: date
+    cel: str
+    kwota: float
+
+    @classmethod
+    def z_dict(cls, d):
+        return cls(
+            data=_data(_pole(d, "data", "wykorzystania"), "data"),
+            cel=str(_pole(d, "cel", "wykorzystania")),
+            kwota=_liczba(_pole(d, "kwota", "wykorzystania"), "kwota"),
+        )
+
+
+@dataclass(slots=True)
+class Oszczednosci:
+    miesieczne: dict = field(default_factory=dict)
+    wykorzystane: list = field(default_factory=list)
+
+    @classmethod
+    def z_dict(cls, d):
+        if not isinstance(d, dict):
+            raise BladDanych(f"Oczekiwano obiektu z oszczędnościami, otrzymano: {type(d).__name__}")
+        return cls(
+            miesieczne={str(k): _liczba(v, k) for k, v in _obiekt(d, "miesieczne").items()},
+            wykorzystane=[Wykorzystanie.z_dict(w) for w in _tablica(d, "wykorzystane")],
+        )
+
+
+@dataclass(slots=True)
+class WydatekCykliczny:
+    opis: str
+    kwota: float
+    typ: str
+    co_ile_miesiecy: int
+    start: date
+    koniec: date | None = None
+    # "RRRR-MM" -> kwota w danym miesiącu albo None, gdy wystąpienie zostało usunięte
+    nadpisania: dict = field(default_factory=dict)
+
+    @classmethod
+    def z_dict(cls, d):
+        koniec = d.get("koniec")
+        co_ile = _calkowita(_pole(d, "co_ile_miesiecy", "wydatku cyklicznego"), "co_ile_miesiecy")
+        if co_ile < 1:
+            raise BladDanych(f"Nieprawidłowy cykl wydatku cyklicznego: {co_ile}")
+        return cls(
+            opis=str(_pole(d, "opis", "wydatku cyklicznego")),
+            kwota=_liczba(_pole(d, "kwota", "wydatku cyklicznego"), "kwota"),
+            typ=str(_pole(d, "typ", "wydatku cyklicznego")),
+            co_ile_miesiecy=co_ile,
+            start=_data(_pole(d, "start", "wydatku cyklicznego"), "start"),
+            koniec=_data(koniec, "koniec") if koniec else None,
+            nadpisania={
+                str(k): None if v is None else _liczba(v, k)
+                for k, v in _obiekt(d, "nadpisania").items()
+            },
+        )
+
+# ---------- Odczyt / zapis ---------- #
+
+def _wczytaj(plik, domyslne):
+    if not os.path.exists(plik):
+        return domyslne
+    with open(plik, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise BladDanych(f"Plik {plik} nie jest poprawnym JSON-em: {e}") from None
+
+
+@contextmanager
+def zapis_atomowy(plik, tryb="w"):
+    """Zapis do pliku tymczasowego obok `plik`, podmienianego w całości przez `os.replace`.
+
+    Czytelnicy (inne sesje, obserwator, cache) widzą albo starą, albo nową treść –
+    nigdy pół zapisanego pliku.
+    """
+    katalog = os.path.dirname(os.path.abspath(plik))
+    fd, tymczasowy = tempfile.mkstemp(dir=katalog, prefix=f".{os.path.basename(plik)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, tryb, **({} if "b" in tryb else {"encoding": "utf-8"})) as f:
+            yield f
+        os.replace(tymczasowy, plik)
+    except BaseException:
+        if os.path.exists(tymczasowy):
+            os.remove(tymczasowy)
+        raise
+
+
+def _zapisz(plik, dane):
+    with zapis_atomowy(plik) as f:
+        json.dump(dane, f, indent=2, ensure_ascii=False, default=date.isoformat)
+
+
+def _lista(plik, dane):
+    if not isinstance(dane, list) or not all(isinstance(d, dict) for d in dane):
+        raise BladDanych(f"Plik {plik} powinien zawierać listę rekordów")
+    return dane
+
+
+def wczytaj_raty(plik):
+    return [Rata.z_dict(d) for d in _lista(plik, _wczytaj(plik, []))]
+
+
+def zapisz_raty(plik, raty):
+    _zapisz(plik, [asdict(r) for r in raty])
+
+
+def wczytaj_cele(plik):
+    return [Cel.z_dict(d) for d in _lista(plik, _wczytaj(plik, []))]
+
+
+def zapisz_cele(plik, cele):
+    _zapisz(plik, [asdict(c) for c in cele])
+
+
+def wczytaj_oszczednosci(plik):
+    return Oszczednosci.z_dict(_wczytaj(plik, {}))
+
+
+def zapisz_oszczednosci(plik, oszczednosci):
+    _zapisz(plik, asdict(oszczednosci))
+
+
+def wczytaj_wydatki_cykliczne(plik):
+    return [WydatekCykliczny.z_dict(d) for d in _lista(plik, _wczytaj(plik, []))]
+
+
+def zapisz_wydatki_cykliczne(plik, definicje):
+    _zapisz(plik, [asdict(d) for d in definicje])
@@ -0,0 +1,378 @@
+"""Test obciążeniowy: N równoległych sesji Streamlit (AppTest) na wspólnych plikach danych.
+
+Uruchomienie (bez sieci – remote to lokalne gołe repozytorium git):
+
+    python obciazenie.py --sesje 8 --kroki 5
+    python obciazenie.py --sesje 4 --scenariusz wydatki --tryb watki
+
+Tryb `procesy` (domyślny) daje prawdziwą równoległość. AppTest podmienia globalny
+Runtime Streamlita, więc w trybie `watki` cała akcja razem z przebiegiem skryptu
+jest szeregowana – to sekwencyjny punkt odniesienia: sesje się przeplatają, każda
+z własnym (potencjalnie nieaktualnym) stanem, ale nigdy nie działają naraz.
+
+Oprócz czasów akcji raport podaje czas oczekiwania na blokady aplikacji
+(`BazaWydatkow._lock`, `archiwum._blokada`) i liczbę wywołań gita odrzuconych
+przez zajęty `index.lock`. Blokady w pamięci działają w obrębie procesu, więc
+w trybie `procesy` sesje na nie nie czekają; współdzielone pliki JSON nie mają
+żadnej blokady – rywalizację o nie widać tylko jako utracone zapisy.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+
+ZRODLO = os.path.dirname(os.path.abspath(__file__))
+ZNACZNIK = "obc"
+
+# ---------- Dane syntetyczne i repozytorium ---------- #
+
+def _git(*argumenty, katalog):
+    subprocess.run(["git", *argumenty], cwd=katalog, check=True, capture_output=True)
+
+
+def przygotuj_katalog(miesiace=12, wierszy=60, raty=3, ziarno=0):
+    """Tworzy katalog roboczy z kopią aplikacji, danymi syntetycznymi i lokalnym remote."""
+    los = random.Random(ziarno)
+    baza = tempfile.mkdtemp(prefix="obciazenie-")
+    remote = os.path.join(baza, "remote.git")
+    praca = os.path.join(baza, "praca")
+    _git("init", "--bare", "-q", remote, katalog=baza)
+    _git("clone", "-q", remote, praca, katalog=baza)
+    _git("config", "user.name", "obciazenie", katalog=praca)
+    _git("config", "user.email", "obciazenie@localhost", katalog=praca)
+
+    for nazwa in os.listdir(ZRODLO):
+        if nazwa.endswith(".py") and nazwa != os.path.basename(__file__):
+            shutil.copy(os.path.join(ZRODLO, nazwa), praca)
+    shutil.copytree(os.path.join(ZRODLO, "pages"), os.path.join(praca, "pages"))
+
+    dzis = date.today()
+    typy = ["Jedzenie", "Paliwo", "Opłaty stałe", "Wyjścia", "Inne"]
+    for k in range(miesiace):
+        rok, miesiac = divmod(dzis.year * 12 + dzis.month - 1 - k, 12)
+        miesiac += 1
+        wiersze = [{
+            "Data": f"{rok}-{miesiac:02}-{los.randint(1, 28):02}T00:00:00.000",
+            "Kwota": float(los.randint(5, 300)),
+            "Typ": los.choice(typy),
+            "Opis": "syntetyczny",
+        } for _ in range(wierszy)]
+        _zapisz(os.path.join(praca, f"wydatki-{rok}-{miesiac:02}.json"), wiersze)
+
+    _zapisz(os.path.join(praca, "raty.json"), [{
+        "nazwa": f"Rata {i}",
+        "kwota": 100.0 * (i + 1),
+        "liczba_rat": 12,
+        "start": (dzis - timedelta(days=40)).isoformat(),
+        "koniec": (dzis + timedelta(days=300)).isoformat(),
+    } for i in range(raty)])
+    _zapisz(os.path.join(praca, "cele.json"), [{
+        "emoji": "🎯",
+        "cel": f"Cel {i}",
+        "kwota_docelowa": 1_000_000.0,
+        "kwota_zebrana": 0.0,
+        "deadline": (dzis + timedelta(days=365)).isoformat(),
+        "doplaty": [],
+        "ukonczony": False,
+    } for i in range(3)])
+    _zapisz(os.path.join(praca, "oszczednosci.json"), {"miesieczne": {f"{dzis:%Y-%m}": 5000.0}, "wykorzystane": []})
+
+    _git("add", ".", katalog=praca)
+    _git("commit", "-q", "-m", "Dane syntetyczne", katalog=praca)
+    _git("push", "-q", "origin", "HEAD", katalog=praca)
+    _git("branch", "--set-upstream-to", f"origin/{_galaz(praca)}", katalog=praca)
+    return praca
+
+
+def _galaz(katalog):
+    return subprocess.run(["git", "rev-parse", "--abbrev-ref", "HEAD"], cwd=katalog,
+                          check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _zapisz(plik, dane):
+    with open(plik, "w", encoding="utf-8") as f:
+        json.dump(dane, f, indent=2, ensure_ascii=False)
+
+# ---------- Pomiar wywołań gita ---------- #
+
+# AppTest wykonuje skrypt we własnym wątku, więc pomiary zbieramy dla całego procesu
+_lock = threading.Lock()
+_czasy_gita = []
+_bledy_gita = []
+_oryginalny_run = subprocess.run
+_blokada_apptest = threading.Lock()
+_oczekiwania = []
+
+
+def _mierzony_run(argumenty, *args, **kwargs):
+    """Zamiennik `subprocess.run` – mierzy czas gita i liczy nieudane wywołania (np. index.lock)."""
+    if not (isinstance(argumenty, (list, tuple)) and argumenty and argumenty[0] == "git"):
+        return _oryginalny_run(argumenty, *args, **kwargs)
+    kwargs.setdefault("capture_output", True)
+    start = time.perf_counter()
+    try:
+        return _oryginalny_run(argumenty, *args, **kwargs)
+    except subprocess.CalledProcessError as e:
+        bledy = e.stderr.decode(errors="replace") if isinstance(e.stderr, bytes) else e.stderr or ""
+        with _lock:
+            _bledy_gita.append(f"{argumenty[1]} (index.lock)" if "index.lock" in bledy else argumenty[1])
+        raise
+    finally:
+        with _lock:
+            _czasy_gita.append(time.perf_counter() - start)
+
+# ---------- Pomiar blokad aplikacji ---------- #
+
+class _MierzonaBlokada:
+    """Opakowanie blokady aplikacji – zapisuje czas oczekiwania na każde jej wzięcie."""
+
+    def __init__(self, blokada, nazwa):
+        self._blokada = blokada
+        self._nazwa = nazwa
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self._blokada.acquire()
+        with _lock:
+            _oczekiwania.append((self._nazwa, time.perf_counter() - start))
+        return self
+
+    def __exit__(self, *wyjatek):
+        self._blokada.release()
+
+
+def _mierz_blokady():
+    """Podmienia blokady archiwum i wspólnej bazy na mierzone (raz na proces)."""
+    import archiwum
+    import baza_wydatkow
+
+    with _lock:
+        if isinstance(archiwum._blokada, _MierzonaBlokada):
+            return
+        archiwum._blokada = _MierzonaBlokada(archiwum._blokada, "archiwum._blokada")
+        klasa = baza_wydatkow.BazaWydatkow
+        oryginalny_init = klasa.__init__
+
+        def __init__(self):
+            oryginalny_init(self)
+            self._lock = _MierzonaBlokada(self._lock, "BazaWydatkow._lock")
+
+        klasa.__init__ = __init__
+
+# ---------- Scenariusze ---------- #
+
+def _widget(lista, etykieta):
+    return next(w for w in lista if w.label == etykieta and not w.key)
+
+
+def _przycisk(at, etykieta=None, klucz=None):
+    return next(b for b in at.button if (klucz and b.key == klucz) or (etykieta and b.label == etykieta))
+
+
+def _dodaj_wydatek(at, sesja, krok):
+    _widget(at.number_input, "Kwota (zł)").set_value(1.0)
+    _widget(at.text_input, "Opis").set_value(f"{ZNACZNIK}-{sesja}-{krok}")
+    _przycisk(at, "Dodaj wydatek").click()
+
+
+def _przelacz_rate(at, sesja, krok):
+    # każda sesja przełącza własną ratę, ale wszystkie zapisują ten sam raty_status.json
+    pole = at.checkbox(key=f"check_Rata {sesja}")
+    oplacona = not pole.value
+    pole.set_value(oplacona)
+    return f"Rata {sesja}", oplacona
+
+
+def _rata_oplacona(praca, nazwa):
+    plik = os.path.join(praca, "raty_status.json")
+    if not os.path.exists(plik):
+        return False
+    for _ in range(5):
+        try:
+            with open(plik, encoding="utf-8") as f:
+                status = json.load(f)
+            break
+        except json.JSONDecodeError:  # inna sesja właśnie zapisuje plik
+            time.sleep(0.01)
+    else:
+        return False
+    return nazwa in status.get(f"{date.today():%Y-%m}", [])
+
+
+def _doplac_do_celu(at, sesja, krok):
+    i = sesja % 3
+    at.number_input(key=f"doplata_{i}").set_value(float(sesja * 1000 + krok + 1))
+    _przycisk(at, klucz=f"zapisz_doplata_{i}").click()
+
+
+SCENARIUSZE = {
+    "wydatki": ("pages/monthly_view.py", _dodaj_wydatek),
+    "raty": ("pages/raty.py", _przelacz_rate),
+    "cele": ("pages/savings_goals.py", _doplac_do_celu),
+}
+
+# scenariusze, w których akcja zwraca oczekiwany stan (nazwa, wartość) sprawdzany w plikach
+SPRAWDZENIA = {
+    "raty": _rata_oplacona,
+}
+
+
+def sesja(praca, numer, scenariusz, kroki):
+    """Jedna symulowana sesja przeglądarki; zwraca czasy akcji i pomiary gita z tego procesu."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(praca)
+    if praca not in sys.path:
+        sys.path.insert(0, praca)
+    subprocess.run = _mierzony_run
+    _mierz_blokady()
+
+    strona, akcja = SCENARIUSZE[scenariusz]
+    at = AppTest.from_file(os.path.join(praca, strona), default_timeout=120)
+    with _blokada_apptest:
+        at.run()
+    sprawdz = SPRAWDZENIA.get(scenariusz)
+    czasy, wyjatki, utracone, oczekiwane = [], 0, 0, None
+    poczatek = time.time()
+    for krok in range(kroki):
+        with _blokada_apptest:
+            # zapis z poprzedniego kroku nadpisany przez inną sesję = utracona aktualizacja
+            if sprawdz and oczekiwane and sprawdz(praca, oczekiwane[0]) != oczekiwane[1]:
+                utracone += 1
+            start = time.perf_counter()
+            oczekiwane = akcja(at, numer, krok)
+            at.run()
+            czasy.append(time.perf_counter() - start)
+        wyjatki += len(at.exception)
+    return {
+        "scenariusz": scenariusz,
+        "czasy": czasy,
+        "okno": (poczatek, time.time()),
+        "wyjatki": wyjatki,
+        "utracone": utracone,
+        "oczekiwane": oczekiwane,
+        "git": list(_czasy_gita),
+        "bledy_gita": list(_bledy_gita),
+        "blokady": list(_oczekiwania),
+    }
+
+# ---------- Utracone zapisy ---------- #
+
+def policz_utracone(praca, wyniki):
+    oczekiwane = {"wydatki": 0, "cele": 0}
+    for w in wyniki:
+        if w["scenariusz"] in oczekiwane:
+            oczekiwane[w["scenariusz"]] += len(w["czasy"])
+
+    znalezione_wydatki = 0
+    for plik in os.listdir(praca):
+        if plik.startswith("wydatki-") and plik.endswith(".json"):
+            with open(os.path.join(praca, plik), encoding="utf-8") as f:
+                znalezione_wydatki += sum(str(w.get("Opis", "")).startswith(ZNACZNIK) for w in json.load(f))
+
+    with open(os.path.join(praca, "cele.json"), encoding="utf-8") as f:
+        znalezione_doplaty = sum(len(c.get("doplaty", [])) for c in json.load(f))
+
+    # ostatni zapis każdej sesji sprawdzamy po zakończeniu wszystkich, wcześniejsze – w trakcie
+    utracone_raty = 0
+    for w in wyniki:
+        if w["scenariusz"] == "raty":
+            utracone_raty += w["utracone"]
+            if w["oczekiwane"] and _rata_oplacona(praca, w["oczekiwane"][0]) != w["oczekiwane"][1]:
+                utracone_raty += 1
+
+    return {
+        "wydatki": oczekiwane["wydatki"] - znalezione_wydatki,
+        "raty": utracone_raty,
+        "cele": oczekiwane["cele"] - znalezione_doplaty,
+    }
+
+# ---------- Raport ---------- #
+
+def _percentyl(wartosci, p):
+    if not wartosci:
+        return 0.0
+    wartosci = sorted(wartosci)
+    return wartosci[min(len(wartosci) - 1, int(round(p / 100 * (len(wartosci) - 1))))]
+
+
+def raport(wyniki, czas_calkowity, utracone, git, bledy, blokady, tryb):
+    print(f"{'scenariusz':<10} {'akcje':>6} {'akcje/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'utracone':>9} {'wyjątki':>8}")
+    for nazwa in SCENARIUSZE:
+        czesc = [w for w in wyniki if w["scenariusz"] == nazwa]
+        if not czesc:
+            continue
+        czasy = [c for w in czesc for c in w["czasy"]]
+        print(f"{nazwa:<10} {len(czasy):>6} {len(czasy) / czas_calkowity:>8.2f} "
+              f"{_percentyl(czasy, 50) * 1000:>8.0f} {_percentyl(czasy, 95) * 1000:>8.0f} {_percentyl(czasy, 99) * 1000:>8.0f} "
+              f"{utracone.get(nazwa, '-'):>9} {sum(w['wyjatki'] for w in czesc):>8}")
+
+    print(f"\nŁącznie: {sum(len(w['czasy']) for w in wyniki)} akcji w {czas_calkowity:.1f} s")
+    print(f"Czas wywołań gita (bez zapisów JSON): {len(git)} wywołań, "
+          f"p50 {_percentyl(git, 50) * 1000:.0f} ms, p95 {_percentyl(git, 95) * 1000:.0f} ms, "
+          f"łącznie {sum(git):.1f} s, nieudane: {len(bledy)} "
+          f"({', '.join(f'{k}: {bledy.count(k)}' for k in sorted(set(bledy)))})")
+
+    print("Oczekiwanie na blokady aplikacji:")
+    for nazwa in ("BazaWydatkow._lock", "archiwum._blokada"):
+        czasy = [c for n, c in blokady if n == nazwa]
+        print(f"  {nazwa:<20} {len(czasy):>5} wejść, p95 {_percentyl(czasy, 95) * 1000:.1f} ms, "
+              f"max {max(czasy, default=0.0) * 1000:.1f} ms, łącznie {sum(czasy):.2f} s")
+    if tryb == "watki":
+        print("Uwaga: tryb `watki` szereguje całe akcje (sekwencyjny punkt odniesienia) – "
+              "blokady aplikacji nie mają tu z kim rywalizować.")
+    else:
+        print("Uwaga: blokady w pamięci są osobne w każdym procesie-sesji; pliki JSON nie mają "
+              "blokad, więc rywalizację o nie pokazują tylko utracone zapisy i błędy index.lock.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy aplikacji Streamlit na wspólnych plikach danych.")
+    parser.add_argument("--sesje", type=int, default=4)
+    parser.add_argument("--kroki", type=int, default=5)
+    parser.add_argument("--scenariusz", choices=[*SCENARIUSZE, "mix"], default="mix")
+    parser.add_argument("--tryb", choices=["procesy", "watki"], default="procesy",
+                        help="procesy: prawdziwa równoległość; watki: sekwencyjny punkt odniesienia "
+                             "(akcje szeregowane, bo AppTest ma jeden globalny Runtime)")
+    parser.add_argument("--miesiace", type=int, default=12, help="liczba miesięcy syntetycznej historii")
+    parser.add_argument("--wierszy", type=int, default=60, help="liczba wydatków w miesiącu")
+    parser.add_argument("--zostaw", action="store_true", help="nie usuwaj katalogu roboczego")
+    args = parser.parse_args()
+
+    praca = przygotuj_katalog(args.miesiace, args.wierszy, raty=max(3, args.sesje))
+    nazwy = list(SCENARIUSZE)
+    scenariusze = [nazwy[i % len(nazwy)] if args.scenariusz == "mix" else args.scenariusz for i in range(args.sesje)]
+
+    if args.tryb == "watki":
+        pula = ThreadPoolExecutor(max_workers=args.sesje)
+    else:
+        # jeden proces na sesję, żeby pomiary gita z procesu należały do jednej sesji
+        pula = ProcessPoolExecutor(max_workers=args.sesje, max_tasks_per_child=1)
+    with pula:
+        wyniki = list(pula.map(sesja, [praca] * args.sesje, range(args.sesje), scenariusze, [args.kroki] * args.sesje))
+    # przepustowość liczymy od pierwszej do ostatniej akcji – bez startu procesów i pierwszego renderu
+    czas_calkowity = max(w["okno"][1] for w in wyniki) - min(w["okno"][0] for w in wyniki)
+
+    if args.tryb == "watki":
+        git, bledy, blokady = _czasy_gita, _bledy_gita, _oczekiwania
+    else:
+        git = [c for w in wyniki for c in w["git"]]
+        bledy = [b for w in wyniki for b in w["bledy_gita"]]
+        blokady = [b for w in wyniki for b in w["blokady"]]
+    raport(wyniki, czas_calkowity, policz_utracone(praca, wyniki), git, bledy, blokady, args.tryb)
+    if args.zostaw:
+        print(f"\nKatalog roboczy: {praca}")
+    else:
+        shutil.rmtree(os.path.dirname(praca), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import fnmatch
+import os
+import threading
+import time
+
+import streamlit as st
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # bez watchdoga zostaje odpytywanie katalogu
+    FileSystemEventHandler = object
+    Observer = None
+
+WZORZEC_DANYCH = "*.json"
+INTERWAL = 2.0
+
+# ---------- Obserwator katalogu z danymi ---------- #
+
+class ObserwatorPlikow:
+    """Śledzi pliki danych (inotify przez watchdog albo odpytywanie co `interwal` sekund).
+
+    Każdy plik ma sygnaturę (mtime, rozmiar) i licznik wersji. Zmiana pliku – także
+    z zewnątrz, np. po `git pull` – podbija jego licznik i licznik globalny.
+    """
+
+    def __init__(self, katalog=".", wzorzec=WZORZEC_DANYCH, interwal=INTERWAL):
+        self.katalog = os.path.abspath(katalog)
+        self.wzorzec = wzorzec
+        self.interwal = interwal
+        self.licznik = 0
+        self._lock = threading.Lock()
+        self._sygnatury = {}
+        self._wersje = {}
+        for nazwa in self._pliki():
+            self._sygnatury[nazwa] = self._sygnatura(nazwa)
+            self._wersje[nazwa] = 0
+        self.tryb = self._uruchom()
+
+    def _pliki(self):
+        return [n for n in os.listdir(self.katalog) if fnmatch.fnmatch(n, self.wzorzec)]
+
+    def _sygnatura(self, nazwa):
+        try:
+            stat = os.stat(os.path.join(self.katalog, nazwa))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _uruchom(self):
+        if Observer is not None:
+            try:
+                obserwator = Observer()
+                obserwator.schedule(_Zdarzenia(self), self.katalog, recursive=False)
+                obserwator.daemon = True
+                obserwator.start()
+                return "inotify"
+            except OSError:
+                pass
+        threading.Thread(target=self._odpytuj, daemon=True).start()
+        return "odpytywanie"
+
+    def _odpytuj(self):
+        while True:
+            time.sleep(self.interwal)
+            for nazwa in set(self._pliki()) | set(self._sygnatury):
+                self.sprawdz(nazwa)
+
+    def sprawdz(self, nazwa):
+        """Porównuje plik z zapamiętaną sygnaturą i zwraca aktualną sygnaturę."""
+        sygnatura = self._sygnatura(nazwa)
+        with self._lock:
+            if self._sygnatury.get(nazwa) == sygnatura:
+                return sygnatura
+            self._sygnatury[nazwa] = sygnatura
+            self._wersje[nazwa] = self._wersje.get(nazwa, 0) + 1
+            self.licznik += 1
+        return sygnatura
+
+    def wersje(self, *wzorce, odswiez=True):
+        """Liczniki wersji plików pasujących do któregoś z wzorców (wszystkich, gdy brak wzorców)."""
+        if odswiez:
+            for nazwa in set(self._pliki()) | set(self._sygnatury):
+                self.sprawdz(nazwa)
+        with self._lock:
+            return {
+                n: w for n, w in self._wersje.items()
+                if not wzorce or any(fnmatch.fnmatch(n, w) for w in wzorce)
+            }
+
+
+class _Zdarzenia(FileSystemEventHandler):
+    def __init__(self, obserwator):
+        self.obserwator = obserwator
+
+    def on_any_event(self, event):
+        for sciezka in (event.src_path, getattr(event, "dest_path", "")):
+            nazwa = os.path.basename(sciezka)
+            if nazwa and fnmatch.fnmatch(nazwa, self.obserwator.wzorzec):
+                self.obserwator.sprawdz(nazwa)
+
+
+@st.cache_resource
+def obserwator():
+    return ObserwatorPlikow()
+
+# ---------- Cache i sesje ---------- #
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _wczytaj_w_wersji(plik, sygnatura, nazwa_funkcji, _wczytaj):
+    return _wczytaj(plik)
+
+
+def wczytaj(plik, funkcja):
+    """Wczytuje plik przez `funkcja(plik)`; wynik jest cache'owany do czasu zmiany pliku na dysku."""
+    # nazwa funkcji jest częścią klucza – ten sam plik czytany dwiema funkcjami to dwa wpisy
+    nazwa_funkcji = f"{funkcja.__module__}.{funkcja.__qualname__}"
+    return _wczytaj_w_wersji(plik, obserwator().sprawdz(plik), nazwa_funkcji, funkcja)
+
+
+def odswiezaj_po_zmianach(*wzorce):
+    """Przeładowuje stronę, gdy pliki pasujące do wzorców zmienią się na dysku.
+
+    Wymaga `st.fragment` (Streamlit >= 1.37); w starszych wersjach strona odświeży
+    dane dopiero przy następnej interakcji.
+    """
+    if not hasattr(st, "fragment"):
+        return
+    obs = obserwator()
+    st.session_state["_licznik_obserwatora"] = obs.licznik
+    st.session_state["_stan_obserwatora"] = obs.wersje(*wzorce)
+
+    @st.fragment(run_every=INTERWAL)
+    def _czuwaj():
+        obs = obserwator()
+        if obs.licznik == st.session_state.get("_licznik_obserwatora"):
+            return
+        st.session_state["_licznik_obserwatora"] = obs.licznik
+        if obs.wersje(*wzorce, odswiez=False) != st.session_state.get("_stan_obserwatora"):
+            st.rerun()
+
+    _czuwaj()
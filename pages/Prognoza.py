@@ -1,30 +1,17 @@
 import streamlit as st
-import json
 import os
 import pandas as pd
-from datetime import date, datetime
-import matplotlib.pyplot as plt
+from datetime import date
+
+import modele
+import obserwator
+from cykliczne import PLIK_CYKLICZNE, ramka_cykliczna
+from modele import BladDanych
+from wykresy import wykres_kolowy
 
 PLIK_RATY = "raty.json"
 PLIK_OSZCZEDNOSCI = "oszczednosci.json"
 
-# ---------- Ładowanie danych ---------- #
-def wczytaj_raty():
-    if os.path.exists(PLIK_RATY):
-        with open(PLIK_RATY, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-def wczytaj_oszczednosci():
-    if os.path.exists(PLIK_OSZCZEDNOSCI):
-        with open(PLIK_OSZCZEDNOSCI, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"miesieczne": {}, "wykorzystane": []}
-
-def zapisz_oszczednosci(dane):
-    with open(PLIK_OSZCZEDNOSCI, "w", encoding="utf-8") as f:
-        json.dump(dane, f, indent=2, ensure_ascii=False)
-
 # ---------- UI ---------- #
 st.title("📊 Inteligentna prognoza budżetu")
 
@@ -35,12 +22,18 @@ st.subheader("💸 Twoja wypłata")
 wplata = st.number_input("Wpisz swoją wypłatę netto", min_value=0.0, step=100.0)
 
 st.subheader("📜 Średnie miesięczne wydatki z historii")
-wydatki = pd.DataFrame()
+czesci = []
 for plik in os.listdir():
     if plik.startswith("wydatki-") and plik.endswith(".json"):
-        df = pd.read_json(plik)
-        wydatki = pd.concat([wydatki, df], ignore_index=True)
-
+        try:
+            czesci.append(obserwator.wczytaj(plik, pd.read_json))
+        except ValueError as e:
+            st.error(f"❌ Nie udało się wczytać {plik}: {e}")
+            st.stop()
+
+# po archiwizacji może nie zostać żaden gorący plik – wtedy pusta ramka z tymi samymi kolumnami
+wydatki = pd.concat(czesci, ignore_index=True) if czesci else pd.DataFrame()
+wydatki = wydatki.reindex(columns=["Data", "Kwota", "Typ", "Opis"])
 wydatki["Data"] = pd.to_datetime(wydatki["Data"])
 gr = wydatki[wydatki["Data"] >= (today - pd.DateOffset(months=3))]
 
@@ -50,35 +43,46 @@ suma_srednia = srednie_typy.sum()
 st.write("Na podstawie ostatnich 3 miesięcy, oto Twoje średnie miesięczne wydatki:")
 st.dataframe(srednie_typy.round(2).reset_index().rename(columns={"Typ": "Typ wydatku", "Kwota": "Średnio mies."}), hide_index=True)
 
+# ---------- Wydatki cykliczne ---------- #
+st.subheader("🔁 Znane opłaty cykliczne w tym miesiącu")
+try:
+    definicje_cykliczne = obserwator.wczytaj(PLIK_CYKLICZNE, modele.wczytaj_wydatki_cykliczne)
+    raty = obserwator.wczytaj(PLIK_RATY, modele.wczytaj_raty)
+    oszczednosci = obserwator.wczytaj(PLIK_OSZCZEDNOSCI, modele.wczytaj_oszczednosci)
+except BladDanych as e:
+    st.error(f"❌ {e}")
+    st.stop()
+
+koniec_miesiaca = (pd.Timestamp(today) + pd.offsets.MonthEnd(0)).date()
+stale = ramka_cykliczna(definicje_cykliczne, today.replace(day=1), koniec_miesiaca)
+stale_typy = stale.groupby("Typ")["Kwota"].sum()
+suma_stalych = stale_typy.sum()
+if stale.empty:
+    st.info("Brak zdefiniowanych wydatków cyklicznych na ten miesiąc.")
+else:
+    st.dataframe(stale[["Data", "Opis", "Typ", "Kwota"]], hide_index=True)
+
 # ---------- Raty ---------- #
-raty = wczytaj_raty()
-suma_rat = 0.0
-for rata in raty:
-    start = datetime.fromisoformat(rata["start"]).date()
-    koniec = datetime.fromisoformat(rata["koniec"]).date()
-    if start <= today <= koniec:
-        suma_rat += rata["kwota"]
+suma_rat = sum(rata.kwota for rata in raty if rata.aktywna(today))
 
 # ---------- Wyniki ---------- #
-if wplata > 0 and (not srednie_typy.empty or suma_rat > 0):
+if wplata > 0 and (not srednie_typy.empty or suma_stalych > 0 or suma_rat > 0):
     st.subheader("📊 Podsumowanie")
 
-    zostaje = wplata - suma_srednia - suma_rat
+    zostaje = wplata - suma_srednia - suma_stalych - suma_rat
     st.markdown(f"**🔹 Wypłata:** {wplata:.2f} zł")
     st.markdown(f"**🔸 Średnie wydatki miesięczne:** {suma_srednia:.2f} zł")
+    st.markdown(f"**🔸 Opłaty cykliczne:** {suma_stalych:.2f} zł")
     st.markdown(f"**🔸 Raty:** {suma_rat:.2f} zł")
     st.markdown(f"**💰 Potencjalne oszczędności:** `{zostaje:.2f} zł`")
 
-    labels = list(srednie_typy.index) + ["Raty", "Oszczędności"]
-    values = list(srednie_typy.values) + [suma_rat, max(zostaje, 0)]
-    fig, ax = plt.subplots()
-    ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')
-    st.pyplot(fig)
+    typy = srednie_typy.add(stale_typy, fill_value=0)
+    labels = list(typy.index) + ["Raty", "Oszczędności"]
+    values = list(typy.values) + [suma_rat, max(zostaje, 0)]
+    wykres_kolowy(labels, values)
 
     # Zapis do puli oszczędności
     if zostaje > 0:
-        oszczednosci = wczytaj_oszczednosci()
-        oszczednosci["miesieczne"][miesiac_klucz] = round(zostaje, 2)
-        zapisz_oszczednosci(oszczednosci)
+        oszczednosci.miesieczne[miesiac_klucz] = round(zostaje, 2)
+        modele.zapisz_oszczednosci(PLIK_OSZCZEDNOSCI, oszczednosci)
         st.success(f"📥 Oszczędności ({zostaje:.2f} zł) dodane do puli na {miesiac_klucz}!")
@@ -1,33 +1,28 @@
 import streamlit as st
-import json
-import os
-from datetime import datetime, date
+from datetime import date
+
+from modele import BladDanych, wczytaj_raty
+from obserwator import odswiezaj_po_zmianach, wczytaj
 
 PLIK_RATY = "raty.json"
 
 st.title("✅ Raty całkowicie spłacone")
 
-def wczytaj_raty():
-    if os.path.exists(PLIK_RATY):
-        with open(PLIK_RATY, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-raty = wczytaj_raty()
+try:
+    raty = wczytaj(PLIK_RATY, wczytaj_raty)
+except BladDanych as e:
+    st.error(f"❌ {e}")
+    st.stop()
+odswiezaj_po_zmianach(PLIK_RATY)
 today = date.today()
-raty_splacone = []
-
-for rata in raty:
-    data_koniec = datetime.fromisoformat(rata["koniec"]).date()
-    if today > data_koniec:
-        raty_splacone.append(rata)
+raty_splacone = [rata for rata in raty if today > rata.koniec]
 
 if not raty_splacone:
     st.info("Nie masz jeszcze całkowicie spłaconych rat. Ale spokojnie, wszystko w swoim czasie 💪")
 else:
     for rata in raty_splacone:
         with st.container():
-            st.markdown(f"### 🎉 {rata['nazwa']}")
-            st.markdown(f"📅 Okres: `{rata['start']} → {rata['koniec']}`")
-            st.markdown(f"💰 Kwota miesięczna: **{rata['kwota']} zł**")
+            st.markdown(f"### 🎉 {rata.nazwa}")
+            st.markdown(f"📅 Okres: `{rata.start} → {rata.koniec}`")
+            st.markdown(f"💰 Kwota miesięczna: **{rata.kwota} zł**")
             st.success("✅ Rata została w pełni spłacona!")
@@ -1,32 +1,34 @@
 import streamlit as st
 import pandas as pd
-import os
 import subprocess
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+import archiwum
+import modele
+import obserwator
+from baza_wydatkow import NakladkaSesji, baza_wydatkow
+from cykliczne import CYKLE, PLIK_CYKLICZNE, ramka_cykliczna
+from indeks_wydatkow import poprzedni_okres
+from modele import BladDanych, WydatekCykliczny
+from wykresy import przygotuj_kategorie
+
+TYPY_WYDATKOW = [
+    "PayPo", "Allegro Pay", "Studia", "Audi", "Opłaty stałe",
+    "Jedzenie", "Paliwo", "Wyjścia", "Kosmetyki", "Ciuchy", "Inne"
+]
 
 # 📁 Obsługa plików
 
-def pobierz_nazwe_pliku_z_daty(data):
-    return f"wydatki-{data.year}-{data.month:02}.json"
-
-def zapisz_wydatki(df):
-    if not df.empty:
-        data = pd.to_datetime(df['Data'].iloc[-1])
-        plik = pobierz_nazwe_pliku_z_daty(data)
-        df.to_json(plik, orient="records", indent=2, date_format="iso")
-        return plik
-    return None
-
-def wczytaj_wszystkie_wydatki():
-    wszystkie = []
-    for plik in os.listdir():
-        if plik.startswith("wydatki-") and plik.endswith(".json"):
-            df = pd.read_json(plik)
-            wszystkie.append(df)
-    if wszystkie:
-        return pd.concat(wszystkie, ignore_index=True)
-    else:
-        return pd.DataFrame(columns=["Data", "Kwota", "Typ", "Opis"])
+def pobierz_klucz_miesiaca(data):
+    return f"{data.year}-{data.month:02}"
+
+def zatwierdz_zmiany():
+    # zmiany z nakładki sesji trafiają na dysk i do wspólnej bazy; przy błędzie zostają w nakładce
+    try:
+        return baza_wydatkow().zatwierdz(st.session_state["nakladka_wydatkow"])
+    except (OSError, BladDanych) as e:
+        st.error(f"❌ Nie udało się zapisać wydatków: {e}")
+        return []
 
 def wczytaj_ostatnie_miesiace(df, miesiace=3):
     najnowsza_data = df["Data"].max()
@@ -44,12 +46,32 @@ def push_do_gita(komentarz="Aktualizacja wydatków"):
         st.error(str(e))
 
 # 🧠 Inicjalizacja
-if "wydatki" not in st.session_state:
-    st.session_state["wydatki"] = wczytaj_wszystkie_wydatki()
+try:
+    if "nakladka_wydatkow" not in st.session_state:
+        # miesiące starsze niż horyzont trafiają do skompresowanego archiwum, w pamięci zostają tylko nowsze
+        przeniesione = archiwum.archiwizuj()
+        if przeniesione:
+            push_do_gita(f"Zarchiwizowano wydatki: {', '.join(przeniesione)}")
+        # sesja trzyma tylko swoje niezatwierdzone zmiany – wydatki i indeks są we wspólnej bazie procesu
+        st.session_state["nakladka_wydatkow"] = NakladkaSesji()
+
+    # 🔄 Pliki zmienione poza bazą (git pull, ręczna edycja, archiwizacja)
+    baza = baza_wydatkow()
+    baza.odswiez()
+except BladDanych as e:
+    st.error(f"❌ {e}")
+    st.stop()
+obserwator.odswiezaj_po_zmianach("wydatki-*.json", PLIK_CYKLICZNE)
 
 if "limit_budzetu" not in st.session_state:
     st.session_state["limit_budzetu"] = 3000.0
 
+try:
+    definicje_cykliczne = obserwator.wczytaj(PLIK_CYKLICZNE, modele.wczytaj_wydatki_cykliczne)
+except BladDanych as e:
+    st.error(f"❌ {e}")
+    st.stop()
+
 st.title("📅 Miesięczny przegląd wydatków")
 
 # ➕ Dodawanie wydatku
@@ -57,42 +79,114 @@ with st.form("dodaj_wydatek"):
     st.subheader("➕ Dodaj nowy wydatek")
     data = st.date_input("Data", value=datetime.today())
     kwota = st.number_input("Kwota (zł)", min_value=0.0, step=1.0)
-    typ = st.selectbox("Typ wydatku", [
-        "PayPo", "Allegro Pay", "Studia", "Audi", "Opłaty stałe",
-        "Jedzenie", "Paliwo", "Wyjścia", "Kosmetyki", "Ciuchy", "Inne"
-    ])
+    typ = st.selectbox("Typ wydatku", TYPY_WYDATKOW)
     opis = st.text_input("Opis")
     submitted = st.form_submit_button("Dodaj wydatek")
 
     if submitted:
-        nowy_wydatek = pd.DataFrame([{
-            "Data": data,
-            "Kwota": kwota,
-            "Typ": typ,
-            "Opis": opis
-        }])
-        st.session_state["wydatki"] = pd.concat(
-            [st.session_state["wydatki"], nowy_wydatek], ignore_index=True
-        )
-        plik_json = zapisz_wydatki(st.session_state["wydatki"])
-        if plik_json:
-            push_do_gita(f"Dodano nowy wydatek do {plik_json}")
-        st.success("✅ Dodano wydatek!")
+        st.session_state["nakladka_wydatkow"].dodaj(data, kwota, typ, opis)
+        pliki = zatwierdz_zmiany()
+        if pliki:
+            push_do_gita(f"Dodano nowy wydatek do {', '.join(pliki)}")
+            st.success("✅ Dodano wydatek!")
+
+# 🔁 Wydatki cykliczne
+with st.expander("🔁 Wydatki cykliczne (opłaty stałe, subskrypcje)"):
+    with st.form("dodaj_cykliczny"):
+        c_opis = st.text_input("Opis", key="cykliczny_opis")
+        c_kwota = st.number_input("Kwota (zł)", min_value=0.0, step=10.0, key="cykliczny_kwota")
+        c_typ = st.selectbox("Typ wydatku", TYPY_WYDATKOW, index=TYPY_WYDATKOW.index("Opłaty stałe"), key="cykliczny_typ")
+        c_cykl = st.selectbox("Powtarzaj", list(CYKLE), key="cykliczny_cykl")
+        c_start = st.date_input("Od", value=datetime.today(), key="cykliczny_start")
+        c_bez_konca = st.checkbox("Bez daty końcowej", value=True, key="cykliczny_bez_konca")
+        c_koniec = st.date_input("Do", value=datetime.today(), key="cykliczny_koniec")
+        if st.form_submit_button("Dodaj wydatek cykliczny") and c_opis:
+            definicje_cykliczne.append(WydatekCykliczny(
+                opis=c_opis,
+                kwota=c_kwota,
+                typ=c_typ,
+                co_ile_miesiecy=CYKLE[c_cykl],
+                start=c_start,
+                koniec=None if c_bez_konca else c_koniec
+            ))
+            modele.zapisz_wydatki_cykliczne(PLIK_CYKLICZNE, definicje_cykliczne)
+            push_do_gita(f"Dodano wydatek cykliczny: {c_opis}")
+            st.rerun()
+
+    nazwy_cykli = {v: k for k, v in CYKLE.items()}
+    for i, definicja in enumerate(definicje_cykliczne):
+        col1, col2 = st.columns([5, 1])
+        cykl = nazwy_cykli.get(definicja.co_ile_miesiecy, f"Co {definicja.co_ile_miesiecy} mies.")
+        col1.markdown(f"**{definicja.opis}** – {definicja.kwota} zł ({definicja.typ}), {cykl.lower()}, `{definicja.start} → {definicja.koniec or '…'}`")
+        if col2.button("🗑️", key=f"usun_cykliczny_{i}"):
+            definicje_cykliczne.pop(i)
+            modele.zapisz_wydatki_cykliczne(PLIK_CYKLICZNE, definicje_cykliczne)
+            push_do_gita(f"Usunięto wydatek cykliczny: {definicja.opis}")
+            st.rerun()
+
+    if definicje_cykliczne:
+        st.markdown("✏️ **Inna kwota w wybranym miesiącu**")
+        col1, col2, col3 = st.columns(3)
+        n_def = col1.selectbox("Wydatek", range(len(definicje_cykliczne)), format_func=lambda n: definicje_cykliczne[n].opis)
+        n_miesiac = col2.date_input("Miesiąc", value=datetime.today(), key="nadpisanie_miesiac")
+        n_kwota = col3.number_input("Kwota (zł)", min_value=0.0, step=10.0, key="nadpisanie_kwota")
+        if st.button("💾 Zapisz kwotę dla miesiąca"):
+            definicja = definicje_cykliczne[n_def]
+            definicja.nadpisania[pobierz_klucz_miesiaca(n_miesiac)] = n_kwota
+            modele.zapisz_wydatki_cykliczne(PLIK_CYKLICZNE, definicje_cykliczne)
+            push_do_gita(f"Zmieniono kwotę wydatku cyklicznego {definicja.opis} w {pobierz_klucz_miesiaca(n_miesiac)}")
+            st.rerun()
 
 # 🔍 Filtrowanie
 
-df = st.session_state["wydatki"].copy()
-df["Data"] = pd.to_datetime(df["Data"])
-df["Miesiąc"] = df["Data"].dt.strftime('%Y-%m')
-df["Rok"] = df["Data"].dt.year
+# wiersze cykliczne są tylko wirtualne i nie trafiają do indeksu – rozwijamy je
+# wyłącznie dla okresów, które widok pokazuje (wybrany rok, zakres dat), najdalej do końca bieżącego miesiąca
+koniec_miesiaca = (pd.Timestamp.today() + pd.offsets.MonthEnd(0)).date()
+
+def cykliczne_w_okresie(od, do):
+    wiersze = ramka_cykliczna(definicje_cykliczne, od, min(do, koniec_miesiaca))
+    wiersze["Miesiąc"] = wiersze["Data"].dt.strftime('%Y-%m')
+    wiersze["Rok"] = wiersze["Data"].dt.year
+    return wiersze
+
+nakladka = st.session_state["nakladka_wydatkow"]
+
+# 🗄️ Archiwum – do sum rocznych i listy miesięcy wystarcza mały indeks z podsumowaniami
+try:
+    indeks_archiwum = obserwator.wczytaj(archiwum.PLIK_INDEKSU, archiwum.wczytaj_indeks)
+except BladDanych as e:
+    st.error(f"❌ {e}")
+    st.stop()
 
 st.sidebar.header("📆 Filtry daty")
-filtr_rok = st.sidebar.selectbox("Rok", sorted(df["Rok"].unique(), reverse=True))
-df_rok = df[df["Rok"] == filtr_rok]
+lata = baza.lata() | nakladka.lata() | {int(m[:4]) for m in indeks_archiwum} | {
+    rok for d in definicje_cykliczne
+    for rok in range(d.start.year, min(d.koniec or koniec_miesiaca, koniec_miesiaca).year + 1)
+}
+filtr_rok = st.sidebar.selectbox("Rok", sorted(lata, reverse=True))
+# wycinek wspólnej ramki – kopia powstaje dopiero przy doklejaniu zmian sesji i wierszy cyklicznych
+df_rok = nakladka.naloz(baza.rok(filtr_rok), filtr_rok)
+if filtr_rok is not None:
+    cykliczne_rok = cykliczne_w_okresie(date(filtr_rok, 1, 1), date(filtr_rok, 12, 31))
+    if not cykliczne_rok.empty:
+        df_rok = pd.concat([df_rok, cykliczne_rok]) if not df_rok.empty else cykliczne_rok
 
-miesiace = df_rok["Miesiąc"].unique()
+miesiace = set(df_rok["Miesiąc"].unique()) | {m for m in indeks_archiwum if m.startswith(f"{filtr_rok}-")}
 filtr_miesiac = st.sidebar.selectbox("Miesiąc", sorted(miesiace, reverse=True))
 df_miesiac = df_rok[df_rok["Miesiąc"] == filtr_miesiac]
+if filtr_miesiac in indeks_archiwum:
+    # archiwum rozpakowujemy dopiero, gdy widok wchodzi w ten miesiąc
+    try:
+        df_archiwum = obserwator.wczytaj(indeks_archiwum[filtr_miesiac]["plik"], archiwum.wczytaj_miesiac).copy()
+    except BladDanych as e:
+        st.error(f"❌ {e}")
+        st.stop()
+    # kolumna Archiwum to stałe id wiersza w pliku archiwum (potrzebne przy usuwaniu)
+    df_archiwum["Archiwum"] = df_archiwum.pop("Id")
+    df_archiwum["Miesiąc"] = filtr_miesiac
+    df_archiwum["Rok"] = filtr_rok
+    df_archiwum.index = [f"a{filtr_miesiac}-{i}" for i in df_archiwum["Archiwum"]]
+    df_miesiac = pd.concat([df_miesiac, df_archiwum]) if not df_miesiac.empty else df_archiwum
 
 dni = df_miesiac["Data"].dt.date.unique()
 filtr_dzien = st.sidebar.selectbox("Dzień", sorted(dni, reverse=True))
@@ -100,7 +194,8 @@ df_dzien = df_miesiac[df_miesiac["Data"].dt.date == filtr_dzien]
 
 # 🔎 Typ wydatku
 st.sidebar.header("🔍 Filtr według typu wydatku")
-dostepne_typy = df["Typ"].unique().tolist()
+dostepne_typy = baza.kategorie()
+dostepne_typy += sorted((set(nakladka.dodane["Typ"]) | {d.typ for d in definicje_cykliczne}) - set(dostepne_typy))
 filtr_typ = st.sidebar.selectbox("Typ wydatku", ["Wszystkie"] + dostepne_typy)
 
 if filtr_typ != "Wszystkie":
@@ -139,24 +234,44 @@ elif sortuj_po == "Kwota (rosnąco)":
 elif sortuj_po == "Kwota (malejąco)":
     df_dzien = df_dzien.sort_values(by="Kwota", ascending=False)
 
+if "komunikat_usuwania" in st.session_state:
+    st.warning(f"⚠️ {st.session_state.pop('komunikat_usuwania')}")
+
 for idx, row in df_dzien.iterrows():
     col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 3, 1])
     col1.write(row["Data"].strftime("%Y-%m-%d"))
     col2.write(f"{row['Kwota']} zł")
     col3.write(row["Typ"])
-    col4.write(row["Opis"])
+    cykliczny = pd.notna(row.get("Cykliczny"))
+    archiwalny = pd.notna(row.get("Archiwum"))
+    col4.write(f"🔁 {row['Opis']}" if cykliczny else row["Opis"])
     if col5.button("🗑️", key=f"usun_{idx}"):
-        st.session_state["wydatki"].drop(index=idx, inplace=True)
-        st.session_state["wydatki"].reset_index(drop=True, inplace=True)
-        plik = zapisz_wydatki(st.session_state["wydatki"])
-        if plik:
+        klucz = pobierz_klucz_miesiaca(row["Data"])
+        if cykliczny:
+            # usunięcie wirtualnego wiersza zapisujemy jako nadpisanie – reszta miesięcy zostaje
+            definicja = definicje_cykliczne[int(row["Cykliczny"])]
+            definicja.nadpisania[klucz] = None
+            modele.zapisz_wydatki_cykliczne(PLIK_CYKLICZNE, definicje_cykliczne)
+            push_do_gita(f"Pominięto wydatek cykliczny {definicja.opis} w {klucz}")
+        elif archiwalny:
+            plik = archiwum.usun_z_archiwum(klucz, int(row["Archiwum"]))
             push_do_gita(f"Usunięto wydatek z {plik}")
+        else:
+            nakladka.usun(idx, row)
+            pliki = zatwierdz_zmiany()
+            if pliki:
+                push_do_gita(f"Usunięto wydatek z {', '.join(pliki)}")
+            elif not isinstance(idx, str):
+                st.session_state["komunikat_usuwania"] = "Tego wydatku już nie ma (usunięty w innej karcie) – nic nie usunięto."
         st.rerun()
 
 # 📊 Podsumowania
 suma_dzien = df_dzien["Kwota"].sum()
 suma_miesiac = df_miesiac["Kwota"].sum()
 suma_rok = df_rok["Kwota"].sum()
+if not (pokaz_stale and filtr_typ not in ("Wszystkie", "Opłaty stałe")):
+    typ_archiwum = "Opłaty stałe" if pokaz_stale else (None if filtr_typ == "Wszystkie" else filtr_typ)
+    suma_rok += archiwum.suma_archiwalna(indeks_archiwum, filtr_rok, typ_archiwum)
 
 col1, col2, col3 = st.columns(3)
 col1.metric(f"🗓️ Dzień{tytul_typu}", f"{suma_dzien:.2f} zł")
@@ -190,5 +305,30 @@ else:
 
 # 📂 Wykres wg typu
 st.subheader("📂 Podział wydatków według typu")
-grupy = df_miesiac.groupby("Typ")["Kwota"].sum().sort_values(ascending=False)
-st.bar_chart(grupy)
+grupy = df_miesiac.groupby("Typ")["Kwota"].sum()
+st.bar_chart(przygotuj_kategorie(grupy))
+
+# 🔎 Dowolny zakres dat
+st.subheader("🔎 Wydatki w wybranym okresie")
+dzis = datetime.today().date()
+zakres = st.date_input("Zakres dat", value=(dzis.replace(day=1), dzis), key="zakres_dat")
+if len(zakres) == 2:
+    od, do = zakres
+    wybrane_typy = st.multiselect("Typy wydatków", dostepne_typy, placeholder="Wszystkie")
+    # wspólny indeks nie zna wierszy cyklicznych ani niezatwierdzonych zmian tej sesji – doliczamy je
+    dodatkowe = pd.concat([cykliczne_w_okresie(poprzedni_okres(od, do)[0].date(), do), nakladka.roznica()])
+    porownanie = baza.porownaj(od, do, dodatkowe=dodatkowe)
+    if wybrane_typy:
+        porownanie = porownanie.reindex(wybrane_typy, fill_value=0.0)
+    suma_okres = porownanie["Okres"].sum()
+    suma_poprzedni = porownanie["Poprzedni okres"].sum()
+
+    col_a, col_b = st.columns(2)
+    col_a.metric(f"💰 {od} → {do}", f"{suma_okres:.2f} zł", delta=f"{suma_okres - suma_poprzedni:.2f} zł", delta_color="inverse")
+    col_b.metric("⏪ Poprzedni okres tej samej długości", f"{suma_poprzedni:.2f} zł")
+    porownanie = porownanie[porownanie.sum(axis=1) > 0]
+    if not porownanie.empty:
+        porownanie["Zmiana"] = porownanie["Okres"] - porownanie["Poprzedni okres"]
+        st.dataframe(porownanie.sort_values("Okres", ascending=False).round(2))
+else:
+    st.info("Wybierz datę początkową i końcową.")
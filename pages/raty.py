@@ -2,22 +2,19 @@ import streamlit as st
 import pandas as pd
 import json
 import os
-from datetime import date, timedelta, datetime
+from datetime import date
 import calendar
 import subprocess
 
+import modele
+import obserwator
+from modele import BladDanych, Rata
+
 PLIK_RATY = "raty.json"
 STATUS_PLIK = "raty_status.json"
 
-def wczytaj_raty():
-    if os.path.exists(PLIK_RATY):
-        with open(PLIK_RATY, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
 def zapisz_raty(raty):
-    with open(PLIK_RATY, "w", encoding="utf-8") as f:
-        json.dump(raty, f, indent=2, ensure_ascii=False)
+    modele.zapisz_raty(PLIK_RATY, raty)
 
 def push_do_gita(komentarz="Aktualizacja rat"):
     try:
@@ -57,7 +54,12 @@ def push_status():
 
 st.title("💳 Moje raty")
 
-raty = wczytaj_raty()
+try:
+    raty = obserwator.wczytaj(PLIK_RATY, modele.wczytaj_raty)
+except BladDanych as e:
+    st.error(f"❌ {e}")
+    st.stop()
+obserwator.odswiezaj_po_zmianach(PLIK_RATY, STATUS_PLIK)
 today = date.today()
 
 # Dodawanie raty
@@ -71,13 +73,13 @@ with st.form("dodaj_rate"):
     dodaj = st.form_submit_button("Dodaj ratę")
     if dodaj and nazwa:
         data_koniec = dodaj_miesiace(data_start, liczba_rat)
-        rata = {
-            "nazwa": nazwa,
-            "kwota": kwota,
-            "liczba_rat": liczba_rat,
-            "start": data_start.isoformat(),
-            "koniec": data_koniec.isoformat()
-        }
+        rata = Rata(
+            nazwa=nazwa,
+            kwota=kwota,
+            liczba_rat=liczba_rat,
+            start=data_start,
+            koniec=data_koniec
+        )
         raty.append(rata)
         zapisz_raty(raty)
         push_do_gita(f"Dodano ratę: {nazwa}")
@@ -88,27 +90,25 @@ with st.form("dodaj_rate"):
 st.subheader("📄 Aktywne raty")
 
 for i, rata in enumerate(raty):
-    data_start = datetime.fromisoformat(rata["start"]).date()
-    data_koniec = datetime.fromisoformat(rata["koniec"]).date()
-    miesiace_minelo = max(0, min((today.year - data_start.year) * 12 + (today.month - data_start.month), rata["liczba_rat"]))
-    pozostalo = rata["liczba_rat"] - miesiace_minelo
-    procent = miesiace_minelo / rata["liczba_rat"]
+    miesiace_minelo = max(0, min((today.year - rata.start.year) * 12 + (today.month - rata.start.month), rata.liczba_rat))
+    pozostalo = rata.liczba_rat - miesiace_minelo
+    procent = miesiace_minelo / rata.liczba_rat
 
     with st.container():
         col1, col2 = st.columns([4, 1])
 
         with col1:
-            st.markdown(f"### 💳 {rata['nazwa']}")
-            st.markdown(f"📅 Okres: `{rata['start']} → {rata['koniec']}`")
-            st.markdown(f"💰 Kwota miesięczna: **{rata['kwota']} zł**")
-            st.markdown(f"📆 Raty zapłacone: `{miesiace_minelo}` z `{rata['liczba_rat']}`")
+            st.markdown(f"### 💳 {rata.nazwa}")
+            st.markdown(f"📅 Okres: `{rata.start} → {rata.koniec}`")
+            st.markdown(f"💰 Kwota miesięczna: **{rata.kwota} zł**")
+            st.markdown(f"📆 Raty zapłacone: `{miesiace_minelo}` z `{rata.liczba_rat}`")
             st.progress(procent, text=f"{int(procent*100)}% spłacone")
 
         with col2:
             if st.button("🗑️ Usuń", key=f"usun_{i}"):
                 raty.pop(i)
                 zapisz_raty(raty)
-                push_do_gita(f"Usunięto ratę: {rata['nazwa']}")
+                push_do_gita(f"Usunięto ratę: {rata.nazwa}")
                 st.rerun()
 
 # Raty do zapłaty w tym miesiącu
@@ -118,23 +118,18 @@ status = wczytaj_status()
 miesiac_klucz = f"{today.year}-{today.month:02}"
 status_miesiaca = status.get(miesiac_klucz, [])
 
-raty_do_zaplaty = []
-for rata in raty:
-    start = datetime.fromisoformat(rata["start"]).date()
-    koniec = datetime.fromisoformat(rata["koniec"]).date()
-    if start <= today <= koniec:
-        raty_do_zaplaty.append(rata)
+raty_do_zaplaty = [rata for rata in raty if rata.aktywna(today)]
 
 if not raty_do_zaplaty:
     st.success("✅ Wszystkie raty zapłacone lub brak rat w tym miesiącu.")
 else:
-    suma_miesiaca = sum([r["kwota"] for r in raty_do_zaplaty])
+    suma_miesiaca = sum([r.kwota for r in raty_do_zaplaty])
     st.markdown(f"💸 Do zapłaty w **{miesiac_klucz}**: **{suma_miesiaca:.2f} zł**")
     for rata in raty_do_zaplaty:
-        nazwa = rata["nazwa"]
+        nazwa = rata.nazwa
         opłacona = nazwa in status_miesiaca
 
-        if st.checkbox(f"{nazwa} – {rata['kwota']} zł", value=opłacona, key=f"check_{nazwa}"):
+        if st.checkbox(f"{nazwa} – {rata.kwota} zł", value=opłacona, key=f"check_{nazwa}"):
             if nazwa not in status_miesiaca:
                 status_miesiaca.append(nazwa)
                 status[miesiac_klucz] = status_miesiaca
@@ -1,28 +1,27 @@
 import streamlit as st
 import pandas as pd
-import json
+import numpy as np
 import os
 import subprocess
-from datetime import date, datetime
+from datetime import date
+
+import modele
+import obserwator
+from modele import BladDanych, Cel, Doplata, Wykorzystanie
 
 PLIK_CELE = "cele.json"
 PLIK_OSZCZEDNOSCI = "oszczednosci.json"
 
 # ------------- Dane i pomocnicze funkcje ------------- #
 
-def wczytaj_cele():
-    if os.path.exists(PLIK_CELE):
-        with open(PLIK_CELE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
 def zapisz_cele(cele):
-    with open(PLIK_CELE, "w", encoding="utf-8") as f:
-        json.dump(cele, f, indent=2, ensure_ascii=False)
+    modele.zapisz_cele(PLIK_CELE, cele)
 
 def push_do_gita(komentarz="Aktualizacja celów"):
     try:
-        subprocess.run(["git", "add", PLIK_CELE], check=True)
+        # przypisania zmieniają też rejestr oszczędności – oba pliki idą w jednym commicie
+        pliki = [p for p in (PLIK_CELE, PLIK_OSZCZEDNOSCI) if os.path.exists(p)]
+        subprocess.run(["git", "add", *pliki], check=True)
         subprocess.run(["git", "commit", "-m", komentarz], check=True)
         subprocess.run(["git", "push"], check=True)
         st.success("📤 Cele wypchnięte na GitHuba!")
@@ -39,54 +38,106 @@ def oblicz_kolor_progresu(procent):
         return "green"
 
 def szacuj_potrzebna_kwote(cel):
-    deadline = datetime.fromisoformat(cel["deadline"])
-    dzis = datetime.today()
-    dni_pozostale = (deadline - dzis).days
-    kwota_pozostala = cel["kwota_docelowa"] - cel["kwota_zebrana"]
+    dni_pozostale = (cel.deadline - date.today()).days
+    kwota_pozostala = cel.kwota_docelowa - cel.kwota_zebrana
     if dni_pozostale <= 0 or kwota_pozostala <= 0:
         return None
     miesiace = max(dni_pozostale / 30, 1)
     return round(kwota_pozostala / miesiace, 2)
 
-# ------------- Oszczędności ------------- #
+def rozdziel_pule(cele, pula, tryb="deadline"):
+    """Dzieli pulę między aktywne cele jednym obliczeniem na tablicach.
+
+    "deadline" – proporcjonalnie do wymaganej kwoty miesięcznej (bliższy deadline = większa waga);
+                 nadwyżka ponad brakującą kwotę celu trafia do pozostałych celów,
+    "niedobor" – najpierw pokrywa wymagane kwoty celów o najbliższym deadlinie.
+    Zwraca listę kwot w kolejności `cele` (0 dla celów ukończonych).
+    """
+    if not cele or pula <= 0:
+        return [0.0] * len(cele)
+
+    docelowa = np.array([c.kwota_docelowa for c in cele], dtype=float)
+    zebrana = np.array([c.kwota_zebrana for c in cele], dtype=float)
+    aktywny = np.array([not c.ukonczony for c in cele])
+    deadline = np.array([c.deadline for c in cele], dtype="datetime64[D]")
+
+    pozostala = np.where(aktywny, np.clip(docelowa - zebrana, 0, None), 0.0)
+    dni = (deadline - np.datetime64(date.today(), "D")).astype(float)
+    # po terminie cel dostaje całą brakującą kwotę jako wymaganą na ten miesiąc
+    miesiace = np.maximum(dni / 30, 1)
+    wymagana = pozostala / miesiace
+
+    if tryb == "niedobor":
+        kolejnosc = np.argsort(deadline, kind="stable")
+        narastajaco = np.cumsum(wymagana[kolejnosc])
+        przydzial = np.empty_like(wymagana)
+        przydzial[kolejnosc] = np.clip(pula - (narastajaco - wymagana[kolejnosc]), 0, wymagana[kolejnosc])
+    else:
+        if wymagana.sum() <= 0:
+            return [0.0] * len(cele)
+        # "napełnianie": co zostało po celach, które dobiły do brakującej kwoty,
+        # dzielimy proporcjonalnie między resztę – najwyżej jedna runda na cel
+        przydzial = np.zeros_like(wymagana)
+        otwarte = wymagana > 0
+        reszta = min(pula, pozostala.sum())
+        while reszta > 1e-9 and otwarte.any():
+            udzial = np.where(otwarte, reszta * wymagana / wymagana[otwarte].sum(), 0.0)
+            przydzial = np.minimum(przydzial + udzial, pozostala)
+            otwarte &= przydzial < pozostala
+            reszta = min(pula, pozostala.sum()) - przydzial.sum()
+
+    return (np.floor(przydzial * 100) / 100).tolist()
 
-def wczytaj_oszczednosci():
-    if os.path.exists(PLIK_OSZCZEDNOSCI):
-        with open(PLIK_OSZCZEDNOSCI, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"miesieczne": {}, "wykorzystane": []}
+# ------------- Oszczędności ------------- #
 
 def zapisz_oszczednosci(dane):
-    with open(PLIK_OSZCZEDNOSCI, "w", encoding="utf-8") as f:
-        json.dump(dane, f, indent=2, ensure_ascii=False)
+    modele.zapisz_oszczednosci(PLIK_OSZCZEDNOSCI, dane)
 
 def dodaj_wykorzystanie_oszczednosci(dane, cel, kwota):
-    wpis = {
-        "data": date.today().isoformat(),
-        "cel": cel,
-        "kwota": kwota
-    }
-    dane["wykorzystane"].append(wpis)
     dzis = date.today()
+    dane.wykorzystane.append(Wykorzystanie(data=dzis, cel=cel, kwota=kwota))
     klucz = f"{dzis.year}-{dzis.month:02}"
-    if klucz in dane["miesieczne"]:
-        dane["miesieczne"][klucz] -= kwota
-        if dane["miesieczne"][klucz] < 0:
-            dane["miesieczne"][klucz] = 0
+    if klucz in dane.miesieczne:
+        dane.miesieczne[klucz] -= kwota
+        if dane.miesieczne[klucz] < 0:
+            dane.miesieczne[klucz] = 0
     zapisz_oszczednosci(dane)
 
+def przypisz_hurtowo(cele, dane, przydzial):
+    """Dopisuje przydział do celów i rejestru oszczędności – jeden zapis każdego pliku."""
+    dzis = date.today()
+    klucz = f"{dzis.year}-{dzis.month:02}"
+    suma = 0.0
+    for cel, kwota in zip(cele, przydzial):
+        if kwota <= 0:
+            continue
+        cel.kwota_zebrana += kwota
+        cel.doplaty.append(Doplata(data=dzis, kwota=kwota))
+        dane.wykorzystane.append(Wykorzystanie(data=dzis, cel=cel.cel, kwota=kwota))
+        suma += kwota
+    if klucz in dane.miesieczne:
+        dane.miesieczne[klucz] = max(round(dane.miesieczne[klucz] - suma, 2), 0)
+    zapisz_oszczednosci(dane)
+    zapisz_cele(cele)
+    return round(suma, 2)
+
 # ------------- UI Start ------------- #
 
 st.title("🎯 Moje cele oszczędnościowe")
 
-cele = wczytaj_cele()
-oszczednosci = wczytaj_oszczednosci()
+try:
+    cele = obserwator.wczytaj(PLIK_CELE, modele.wczytaj_cele)
+    oszczednosci = obserwator.wczytaj(PLIK_OSZCZEDNOSCI, modele.wczytaj_oszczednosci)
+except BladDanych as e:
+    st.error(f"❌ {e}")
+    st.stop()
+obserwator.odswiezaj_po_zmianach(PLIK_CELE, PLIK_OSZCZEDNOSCI)
 
 # 🔝 Pasek oszczędności na ten miesiąc
 dzis = date.today()
 miesiac_klucz = f"{dzis.year}-{dzis.month:02}"
-kwota_miesieczna = oszczednosci["miesieczne"].get(miesiac_klucz, 0)
-kwota_ogolna = sum(oszczednosci["miesieczne"].values())
+kwota_miesieczna = oszczednosci.miesieczne.get(miesiac_klucz, 0)
+kwota_ogolna = sum(oszczednosci.miesieczne.values())
 
 st.subheader("💸 Twoje oszczędności")
 col1, col2 = st.columns(2)
@@ -95,27 +146,39 @@ col2.metric("📊 Łącznie dostępne oszczędności", f"{kwota_ogolna:.2f} zł"
 
 if kwota_miesieczna > 0:
     with st.expander("📤 Przypisz oszczędności do celu"):
-        dostepne_cele = [cel for cel in cele if not cel.get("ukonczony", False)]
+        dostepne_cele = [cel for cel in cele if not cel.ukonczony]
         if dostepne_cele:
-            cel_wybor = st.selectbox("Wybierz cel", [c["cel"] for c in dostepne_cele])
+            cel_wybor = st.selectbox("Wybierz cel", [c.cel for c in dostepne_cele])
             kwota_do_dodania = st.number_input("Kwota do dodania", min_value=0.0, max_value=kwota_miesieczna, step=50.0)
             if st.button("💾 Przypisz oszczędność"):
                 for cel in cele:
-                    if cel["cel"] == cel_wybor:
-                        cel["kwota_zebrana"] += kwota_do_dodania
-                        cel.setdefault("doplaty", []).append({
-                            "data": date.today().isoformat(),
-                            "kwota": kwota_do_dodania
-                        })
+                    if cel.cel == cel_wybor:
+                        cel.kwota_zebrana += kwota_do_dodania
+                        cel.doplaty.append(Doplata(data=date.today(), kwota=kwota_do_dodania))
                         dodaj_wykorzystanie_oszczednosci(oszczednosci, cel_wybor, kwota_do_dodania)
                         zapisz_cele(cele)
                         push_do_gita(f"Dodano oszczędności {kwota_do_dodania} zł do celu: {cel_wybor}")
                         st.success("✅ Oszczędność przypisana!")
                         st.rerun()
 
+    with st.expander("⚖️ Rozdziel oszczędności automatycznie"):
+        tryby = {"Według deadline'ów": "deadline", "Minimalny niedobór": "niedobor"}
+        tryb = st.radio("Sposób podziału", list(tryby), horizontal=True)
+        przydzial = rozdziel_pule(cele, kwota_miesieczna, tryby[tryb])
+        podglad = [(c.emoji, c.cel, c.deadline, k) for c, k in zip(cele, przydzial) if k > 0]
+        if podglad:
+            st.dataframe(pd.DataFrame(podglad, columns=["", "Cel", "Deadline", "Kwota"]), hide_index=True)
+            if st.button("💾 Rozdziel pulę"):
+                suma = przypisz_hurtowo(cele, oszczednosci, przydzial)
+                push_do_gita(f"Rozdzielono {suma} zł oszczędności między {len(podglad)} cele")
+                st.success("✅ Oszczędności rozdzielone!")
+                st.rerun()
+        else:
+            st.info("Brak aktywnych celów, które potrzebują dopłat.")
+
 with st.expander("📜 Historia przypisanych oszczędności"):
-    if oszczednosci["wykorzystane"]:
-        df_hist = pd.DataFrame(oszczednosci["wykorzystane"])
+    if oszczednosci.wykorzystane:
+        df_hist = pd.DataFrame(oszczednosci.wykorzystane)
         df_hist["data"] = pd.to_datetime(df_hist["data"])
         df_hist = df_hist.sort_values("data", ascending=False)
         st.dataframe(df_hist.rename(columns={"data": "Data", "cel": "Cel", "kwota": "Kwota"}), hide_index=True)
@@ -133,15 +196,14 @@ with st.form("dodaj_cel"):
 
     dodaj = st.form_submit_button("Dodaj cel")
     if dodaj and nazwa:
-        cel = {
-            "emoji": emoji,
-            "cel": nazwa,
-            "kwota_docelowa": kwota_docelowa,
-            "kwota_zebrana": kwota_zebrana,
-            "deadline": deadline.isoformat(),
-            "doplaty": [{"data": date.today().isoformat(), "kwota": kwota_zebrana}] if kwota_zebrana > 0 else [],
-            "ukonczony": False
-        }
+        cel = Cel(
+            emoji=emoji,
+            cel=nazwa,
+            kwota_docelowa=kwota_docelowa,
+            kwota_zebrana=kwota_zebrana,
+            deadline=deadline,
+            doplaty=[Doplata(data=date.today(), kwota=kwota_zebrana)] if kwota_zebrana > 0 else [],
+        )
         cele.append(cel)
         zapisz_cele(cele)
         push_do_gita(f"Dodano cel: {nazwa}")
@@ -155,20 +217,20 @@ if not cele:
     st.info("Brak celów. Dodaj coś powyżej!")
 else:
     for i, cel in enumerate(cele):
-        if cel.get("ukonczony", False):
+        if cel.ukonczony:
             continue
 
         with st.container():
             col1, col2 = st.columns([4, 1])
 
             with col1:
-                procent = min(cel["kwota_zebrana"] / cel["kwota_docelowa"], 1.0)
+                procent = min(cel.kwota_zebrana / cel.kwota_docelowa, 1.0)
                 kolor = oblicz_kolor_progresu(procent)
 
-                st.markdown(f"### {cel['emoji']} {cel['cel']}")
-                st.markdown(f"📅 Deadline: `{cel['deadline']}`")
+                st.markdown(f"### {cel.emoji} {cel.cel}")
+                st.markdown(f"📅 Deadline: `{cel.deadline}`")
 
-                dni_do_deadline = (datetime.fromisoformat(cel["deadline"]) - datetime.today()).days
+                dni_do_deadline = (cel.deadline - dzis).days
                 if dni_do_deadline <= 14 and procent < 1.0:
                     st.warning(f"⚠️ Zostało tylko {dni_do_deadline} dni do celu!")
 
@@ -176,33 +238,30 @@ else:
                 if potrzebne:
                     st.markdown(f"💡 Musisz odkładać około `{potrzebne} zł/mies.` aby zdążyć.")
 
-                st.markdown(f"💰 Zebrano: **{cel['kwota_zebrana']} / {cel['kwota_docelowa']} zł**")
+                st.markdown(f"💰 Zebrano: **{cel.kwota_zebrana} / {cel.kwota_docelowa} zł**")
                 st.progress(procent, text=f"{int(procent*100)}%")
 
-                if procent >= 1.0 and not cel.get("ukonczony"):
+                if procent >= 1.0 and not cel.ukonczony:
                     if st.button("🎉 Oznacz jako ukończony", key=f"oznacz_{i}"):
-                        cel["ukonczony"] = True
+                        cel.ukonczony = True
                         zapisz_cele(cele)
-                        push_do_gita(f"Oznaczono cel jako ukończony: {cel['cel']}")
+                        push_do_gita(f"Oznaczono cel jako ukończony: {cel.cel}")
                         st.success("🎉 Gratulacje! Cel został ukończony!")
                         st.rerun()
 
                 with st.expander("💰 Dopłać do celu"):
                     doplata = st.number_input("Kwota dopłaty", min_value=0.0, step=50.0, key=f"doplata_{i}")
                     if st.button("✅ Dopłać", key=f"zapisz_doplata_{i}"):
-                        cel["kwota_zebrana"] += doplata
-                        cel.setdefault("doplaty", []).append({
-                            "data": date.today().isoformat(),
-                            "kwota": doplata
-                        })
+                        cel.kwota_zebrana += doplata
+                        cel.doplaty.append(Doplata(data=date.today(), kwota=doplata))
                         zapisz_cele(cele)
-                        push_do_gita(f"Dopłacono {doplata} zł do celu: {cel['cel']}")
+                        push_do_gita(f"Dopłacono {doplata} zł do celu: {cel.cel}")
                         st.success("✅ Dopłata zapisana!")
                         st.rerun()
 
                 with st.expander("📜 Historia dopłat"):
-                    if "doplaty" in cel and cel["doplaty"]:
-                        df_hist = pd.DataFrame(cel["doplaty"])
+                    if cel.doplaty:
+                        df_hist = pd.DataFrame(cel.doplaty)
                         df_hist["data"] = pd.to_datetime(df_hist["data"])
                         df_hist = df_hist.sort_values("data", ascending=False)
                         st.dataframe(df_hist.rename(columns={"data": "Data", "kwota": "Kwota"}), hide_index=True)
@@ -210,11 +269,11 @@ else:
                         st.info("Brak dopłat.")
 
                 with st.expander("📝 Zmień deadline"):
-                    nowy_deadline = st.date_input("Nowy deadline", value=pd.to_datetime(cel["deadline"]), key=f"edit_deadline_{i}")
+                    nowy_deadline = st.date_input("Nowy deadline", value=cel.deadline, key=f"edit_deadline_{i}")
                     if st.button("💾 Zapisz deadline", key=f"zapisz_deadline_{i}"):
-                        cel["deadline"] = nowy_deadline.isoformat()
+                        cel.deadline = nowy_deadline
                         zapisz_cele(cele)
-                        push_do_gita(f"Zmieniono deadline: {cel['cel']}")
+                        push_do_gita(f"Zmieniono deadline: {cel.cel}")
                         st.success("📅 Deadline zaktualizowany!")
                         st.rerun()
 
@@ -222,5 +281,5 @@ else:
                 if st.button("🗑️ Usuń", key=f"usun_{i}"):
                     cele.pop(i)
                     zapisz_cele(cele)
-                    push_do_gita(f"Usunięto cel: {cel['cel']}")
+                    push_do_gita(f"Usunięto cel: {cel.cel}")
                     st.rerun()
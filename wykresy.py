@@ -0,0 +1,66 @@
+import io
+
+import pandas as pd
+import streamlit as st
+from matplotlib.figure import Figure
+
+# Ile słupków/punktów maksymalnie wysyłamy do przeglądarki
+LIMIT_PUNKTOW = 60
+
+# Kolejne, coraz grubsze przedziały agregacji długich historii
+PRZEDZIALY = [("W", "W"), ("ME", "M"), ("QE", "Q"), ("YE", "Y")]
+
+# ---------- Przygotowanie danych ---------- #
+
+@st.cache_data(max_entries=64)
+def przygotuj_szereg(seria, limit=LIMIT_PUNKTOW):
+    """Agreguje szereg czasowy do tygodni/miesięcy/kwartałów/lat, aż zmieści się w limicie punktów.
+
+    Indeks może zawierać daty albo klucze miesięcy w formacie `RRRR-MM`.
+    """
+    if len(seria) <= limit:
+        return seria
+    seria = seria.copy()
+    seria.index = pd.to_datetime(seria.index)
+    for czestotliwosc, okres in PRZEDZIALY:
+        zagregowana = seria.resample(czestotliwosc).sum()
+        if len(zagregowana) <= limit:
+            break
+    zagregowana.index = zagregowana.index.to_period(okres).astype(str)
+    return zagregowana
+
+
+@st.cache_data(max_entries=64)
+def przygotuj_kategorie(seria, limit=12, reszta="Pozostałe"):
+    """Zostawia `limit - 1` największych kategorii, resztę sumuje w jedną."""
+    seria = seria.sort_values(ascending=False)
+    if len(seria) <= limit:
+        return seria
+    glowne = seria.iloc[:limit - 1].copy()
+    glowne[reszta] = seria.iloc[limit - 1:].sum()
+    return glowne
+
+# ---------- Wykresy ---------- #
+
+@st.cache_data(max_entries=32)
+def _wykres_kolowy_png(etykiety, wartosci):
+    # Figure zamiast plt.subplots – figura nie trafia do globalnego rejestru pyplot, więc nie wycieka
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(wartosci, labels=etykiety, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')
+    bufor = io.BytesIO()
+    fig.savefig(bufor, format="png", bbox_inches="tight")
+    return bufor.getvalue()
+
+
+def wykres_kolowy(etykiety, wartosci):
+    """Rysuje wykres kołowy; obrazek jest cache'owany po etykietach i (zaokrąglonych) wartościach."""
+    etykiety = tuple(str(e) for e in etykiety)
+    wartosci = tuple(round(float(w), 2) for w in wartosci)
+    st.image(_wykres_kolowy_png(etykiety, wartosci))
+
+
+def wykres_slupkowy(dane, limit=LIMIT_PUNKTOW):
+    """`st.bar_chart` dla szeregu czasowego, z agregacją historii dłuższych niż `limit`."""
+    st.bar_chart(przygotuj_szereg(dane, limit))